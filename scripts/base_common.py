@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多维表格快照公共模块 (Shared Snapshot Loader)
+=============================================
+功能：供全量字段表、关联关系图两个生成器共用的 .base 读取与名称映射逻辑。
+特性：
+- 解压 gzipSnapshot 并构建表名、字段名映射
+- 按表渲染文档，字段较多时多进程并行
+"""
+
+import json
+import binascii
+import functools
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import glob
+import sys
+import os
+
+# ========== 配置 ==========
+# 所有表的字段总数超过该值时才用多进程渲染，小库直接串行更快（省去进程启动与数据传递）
+PARALLEL_RENDER_THRESHOLD = 2000
+
+# 渲染子进程共用的参数（名称映射等），由 init_render_worker 在每个子进程中设置一次
+RENDER_WORKER_ARGS = ()
+
+
+def find_base_file():
+    """在当前目录下查找 .base 文件"""
+    base_files = glob.glob("*.base")
+    if not base_files:
+        print("❌ 错误：当前目录下未找到 .base 文件，请先导出并上传您的飞书多维表格 .base 文件到本目录。")
+        sys.exit(1)
+    elif len(base_files) > 1:
+        print(f"❌ 错误：当前目录下找到多个 .base 文件 {base_files}，请仅保留一个需要解析的文件。")
+        sys.exit(1)
+    
+    return base_files[0]
+
+
+def decompress_content(compressed_content):
+    """解压 gzip + base64 编码的内容"""
+    try:
+        if isinstance(compressed_content, str):
+            # 直接调用 C 实现的 a2b_base64，省去 b64decode 的 Python 层封装和 str→bytes 编码副本
+            compressed_bytes = binascii.a2b_base64(compressed_content)
+        else:
+            return None
+        # gzip.decompress 会依次解压所有 gzip 成员，与 completeness_checker 的解析结果一致
+        raw = gzip.decompress(compressed_bytes)
+        del compressed_bytes  # 解析前释放压缩数据，降低峰值内存
+        return json.loads(raw)
+    except Exception as e:
+        print(f"解压失败: {e}")
+        return None
+
+
+def build_name_registry(snapshot):
+    """
+    从快照中构建表名和字段名的映射表。
+    返回: (table_map, field_map, field_by_id, all_tables)
+    - table_map: {table_id: table_name}
+    - field_map: {(table_id, field_id): field_name}
+    - field_by_id: {field_id: field_name}，跨表按字段 ID 查找时使用（同一 ID 取最先出现的表）
+    - all_tables: [table_dict, ...]，按表 ID 去重
+    """
+    table_map = {}
+    field_map = {}
+    all_tables = []
+    seen_table_ids = set()
+
+    for item in snapshot:
+        if 'schema' not in item:
+            continue
+        
+        schema = item['schema']
+        
+        # 首先从 tableMap 获取表名（这里通常有完整的表名）
+        for tid, tinfo in schema.get('tableMap', {}).items():
+            if isinstance(tinfo, dict) and tinfo.get('name'):
+                table_map[tid] = tinfo['name']
+        
+        # 然后处理 data 中的表结构
+        if 'data' not in schema:
+            continue
+            
+        data = schema['data']
+        # 复制一份再追加 data.table，不修改快照中的 tables 列表
+        tables = list(data.get('tables', []))
+        if 'table' in data:
+            tables.append(data['table'])
+        
+        for table in tables:
+            if not isinstance(table, dict):
+                continue
+            
+            table_id = table.get('meta', {}).get('id')
+            table_name = table.get('meta', {}).get('name')
+            
+            # 同一张表可能在多个 schema 中重复出现，只收录第一次
+            if table_id:
+                if table_id in seen_table_ids:
+                    continue
+                seen_table_ids.add(table_id)
+            all_tables.append(table)
+            
+            # 只有当 tableMap 中没有这个表时才使用 meta.name
+            if table_id and table_id not in table_map:
+                table_map[table_id] = table_name or table_id
+                
+            # 提取字段名
+            if table_id:
+                for field_id, field_def in table.get('fieldMap', {}).items():
+                    field_name = field_def.get('name') or field_id
+                    field_map[(table_id, field_id)] = field_name
+
+    # 字段 ID 反向索引，避免每次跨表查找都线性扫描 field_map
+    field_by_id = {}
+    for (tid, fid), name in field_map.items():
+        field_by_id.setdefault(fid, name)
+
+    return table_map, field_map, field_by_id, all_tables
+
+
+def init_render_worker(*args):
+    """子进程初始化：保存共用参数，避免每张表都重新序列化整份映射表"""
+    global RENDER_WORKER_ARGS
+    RENDER_WORKER_ARGS = args
+
+
+def render_with_worker_args(render, table):
+    """在子进程中调用 render(table, *共用参数)"""
+    return render(table, *RENDER_WORKER_ARGS)
+
+
+def render_tables(render, tables, *args):
+    """
+    对每张表调用 render(table, *args)，按 tables 顺序返回结果列表。
+    各表渲染互不依赖：字段较多时分发到多个进程并行执行，否则串行。
+    render 必须是模块级函数，以便传给子进程。
+    """
+    total_fields = sum(len(t.get('fieldMap', {})) for t in tables)
+    # ProcessPoolExecutor 的 initializer 参数需要 Python 3.7+，更早的版本直接串行
+    if len(tables) > 1 and total_fields > PARALLEL_RENDER_THRESHOLD and sys.version_info >= (3, 7):
+        try:
+            workers = min(os.cpu_count() or 1, len(tables))
+            chunksize = max(1, len(tables) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker, initargs=args) as executor:
+                return list(executor.map(functools.partial(render_with_worker_args, render), tables, chunksize=chunksize))
+        except (OSError, BrokenProcessPool):
+            # 受限环境下无法创建子进程时退回串行渲染
+            pass
+    
+    return [render(table, *args) for table in tables]
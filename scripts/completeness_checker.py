@@ -10,10 +10,14 @@
 """
 
 import json
-import base64
+import binascii
 import gzip
-import io
-from collections import defaultdict
+import re
+import bisect
+import mmap
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import glob
 import sys
@@ -22,6 +26,9 @@ import os
 # ========== 配置 ==========
 OUTPUT_PATH = "完整性校验报告.md"
 
+# 待扫描文档总大小超过该值时才启用多进程扫描，小文件直接串行更快
+PARALLEL_SCAN_THRESHOLD = 1 << 20
+
 def find_base_file():
     """在当前目录下查找 .base 文件"""
     base_files = glob.glob("*.base")
@@ -35,7 +42,7 @@ def find_base_file():
     return base_files[0]
 
 # 已知的、已被解析器处理的字段（根据 generate_自动化地图.py 的逻辑）
-KNOWN_STEP_KEYS = {
+KNOWN_STEP_KEYS = frozenset({
     # 通用
     'type', 'id', 'data', 'stepTitle',
     # 触发器
@@ -53,44 +60,270 @@ KNOWN_STEP_KEYS = {
     'packId', 'formData', 'version', 'endpointId', 'resultTypeInfo', 'packType',
     # 其他常见字段
     'filterInfo', 'isEnabled', 'stepNum'
-}
+})
 
-KNOWN_WORKFLOW_KEYS = {
+KNOWN_WORKFLOW_KEYS = frozenset({
     'id', 'base_id', 'trigger_name', 'creator', 'editor', 'status', 'delete_flag',
     'created_time', 'updated_time', 'source', 'access_mode', 'webhook_token',
     'biz_type', 'nodeSchema', 'WorkflowExtra'
-}
+})
 
-KNOWN_DRAFT_KEYS = {
+KNOWN_DRAFT_KEYS = frozenset({
     'title', 'steps', 'version'
-}
+})
+
+# 步骤对象本身（data 之外）的已知字段
+KNOWN_STEP_LEVEL_KEYS = frozenset({
+    'type', 'id', 'data', 'stepTitle'
+})
+
+# 文档扫描使用的正则（模块加载时预编译一次）
+# 文档以 UTF-8 字节读取并直接在字节上扫描，只在生成报告时解码命中的片段
+# 匹配模式：(正则, 类型名称, 是否故意显示, 必需字面量, 是否复核 Unicode 词边界)
+# 必需字面量即该正则所有可能起始位置上的前缀
+# 字节正则的 \b 只把 ASCII 字母数字视为单词字符，需要按 Unicode 规则复核两端
+# [未知字段:fldXXX]
+ID_PATTERNS = [
+    (re.compile(pattern.encode('utf-8')), issue_type, category,
+     tuple(lit.encode('utf-8') for lit in literals), word_bounded)
+    for pattern, issue_type, category, literals, word_bounded in [
+        (r'\[未知(?:字段|表|选项|引用)[^:\]]*:([^\]]+)\]', '显式未知项', '未解析', ('[未知',), False),
+        (r'\[已删除的(?:字段|表)[^:\]]*:([^\]]+)\]', '已删除引用', '未解析', ('[已删除',), False),
+        (r'\[步骤\d+的(?:字段|formula|结果)\]', '模糊引用', '可读性差', ('[步骤',), False),
+        (r'\[步骤\d+的循环当前记录\]', '模糊循环', '可读性差', ('[步骤',), False),
+        (r'default_url":\s*"{引用}"', '模糊动作配置', '信息丢失', ('default_url',), False),
+        (r'\b(is|isNot|contains|doesNotContain|isEmpty|isNotEmpty)\b', '未翻译操作符', '英文残留',
+         ('is', 'contains', 'doesNotContain'), True)
+    ]
+]
+
+
+def build_prefix_matcher(id_patterns):
+    """
+    将所有必需字面量合并为一个前缀正则，文档只需扫描一遍；
+    每个命中位置再用对应的完整正则在原位确认。
+    需要词边界的正则，其前缀也带上 \b，跳过 this / list 之类单词内部的命中。
+    返回: (prefix_re, prefix_patterns)
+    - prefix_patterns: {字面量: [id_patterns 下标, ...]}
+    """
+    prefix_patterns = defaultdict(list)
+    parts = []
+    for idx, (_, _, _, literals, word_bounded) in enumerate(id_patterns):
+        for lit in literals:
+            if lit not in prefix_patterns:
+                parts.append((rb'\b' if word_bounded else b'') + re.escape(lit))
+            prefix_patterns[lit].append(idx)
+    return re.compile(b'|'.join(parts)), prefix_patterns
+
+
+ID_PREFIX_RE, ID_PREFIX_PATTERNS = build_prefix_matcher(ID_PATTERNS)
+
+# 二级标题 (## 表名)
+HEADER_RE = re.compile(rb'^##\s+(.*?)$', re.MULTILINE)
+
+# 表格行的第一个单元格 (字段名)
+ROW_RE = re.compile(r'^\|?\s*\*{0,2}(.*?)\*{0,2}\s*\|')
+
+# 扫描到的未翻译项；诊断文案只在渲染报告时才生成
+UntranslatedItem = namedtuple(
+    'UntranslatedItem', 'doc line text match_id table_name field_name category issue_type'
+)
+
+# 报告中单个未翻译项的展示模板 (错误位置为 VS Code 友好的可点击链接)
+UNTRANSLATED_ITEM_TEMPLATE = (
+    "### 问题 {i}: {reason}\n\n"
+    "- **错误位置**: [{doc}:{line}](./{doc}#L{line})\n"
+    "- **精确定位**: 表: {table_name} / 行: {field_name}\n"
+    "- **未解析内容**: `{text}`\n"
+    "- **诊断结果**: {diagnosis}\n"
+    "- **建议操作**: \n{action}\n\n"
+)
+
+# Unicode 单词字符 (用于复核字节正则的 \b)
+WORD_CHAR_RE = re.compile(r'\w')
+
+
+def is_unicode_word_bounded(content, start, end):
+    """检查 content[start:end] 两侧的字符按 Unicode 规则都不是单词字符"""
+    # UTF-8 单个字符最多 4 字节，截断处的残缺字节直接忽略
+    before = content[max(0, start - 4):start].decode('utf-8', 'ignore')[-1:]
+    after = content[end:end + 4].decode('utf-8', 'ignore')[:1]
+    return not WORD_CHAR_RE.match(before) and not WORD_CHAR_RE.match(after)
 
 
 def decompress_content(compressed_content):
     """解压 gzip + base64 编码的内容"""
     try:
         if isinstance(compressed_content, str):
-            compressed_bytes = base64.b64decode(compressed_content)
+            # a2b_base64 可直接接收 ASCII 字符串，不必像 b64decode 那样先编码成 bytes
+            compressed_bytes = binascii.a2b_base64(compressed_content)
         else:
             return None
-        with gzip.GzipFile(fileobj=io.BytesIO(compressed_bytes)) as gz:
-            return json.loads(gz.read().decode('utf-8'))
+        # 一次性解压，并直接解析 JSON 字节，避免额外生成一份解码后的字符串副本
+        return json.loads(gzip.decompress(compressed_bytes))
     except Exception as e:
         print(f"解压失败: {e}")
         return None
 
 
+def scan_document(doc_path):
+    """
+    扫描单份生成的文档，找出其中未翻译的 ID 和可读性问题。
+    文档通过 mmap 映射后直接在字节上扫描，不把整份文件复制到内存。
+    返回: [UntranslatedItem, ...]
+    """
+    with open(doc_path, 'rb') as f:
+        # 空文件无法 mmap，也不可能有匹配
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return scan_content(os.path.basename(doc_path), content)
+
+
+def scan_content(doc_name, content):
+    """扫描文档内容 (bytes 或 mmap)，返回 [UntranslatedItem, ...]"""
+    items = []
+    
+    # 预先记录所有换行符位置，之后按匹配位置二分查找行号
+    nl_offsets = []
+    pos = content.find(b'\n')
+    while pos != -1:
+        nl_offsets.append(pos)
+        pos = content.find(b'\n', pos + 1)
+    
+    # 预先收集所有二级标题 (## 表名)，之后按匹配位置二分查找所属标题
+    headers = list(HEADER_RE.finditer(content))
+    header_starts = [m.start() for m in headers]
+    
+    # 单次扫描找出所有前缀位置，按正则分组收集确认后的匹配
+    # (同一正则的匹配互不重叠，与逐个 finditer 的结果一致)
+    pattern_matches = [[] for _ in ID_PATTERNS]
+    last_ends = [0] * len(ID_PATTERNS)
+    for prefix in ID_PREFIX_RE.finditer(content):
+        pos = prefix.start()
+        for idx in ID_PREFIX_PATTERNS[prefix.group()]:
+            if pos < last_ends[idx]:
+                continue
+            pattern, word_bounded = ID_PATTERNS[idx][0], ID_PATTERNS[idx][4]
+            match = pattern.match(content, pos)
+            if not match:
+                continue
+            if word_bounded and not is_unicode_word_bounded(content, pos, match.end()):
+                continue
+            pattern_matches[idx].append(match)
+            last_ends[idx] = match.end()
+    
+    for (pattern, issue_type, category, literals, word_bounded), matches in zip(ID_PATTERNS, pattern_matches):
+        for match in matches:
+            match_start = match.start()
+            
+            match_text = match.group(0).decode('utf-8') # 完整标签
+            # 对于某些正则，可能没有 group(1)
+            match_id = match.group(1).decode('utf-8') if match.lastindex and match.lastindex >= 1 else match_text
+            
+            # 找到行号 (匹配位置之前的换行符数量 + 1)
+            line_idx = bisect.bisect_left(nl_offsets, match_start)
+            line_num = line_idx + 1
+
+            # 获取该行内容
+            line_start = nl_offsets[line_idx - 1] + 1 if line_idx > 0 else 0
+            line_end = nl_offsets[line_idx] if line_idx < len(nl_offsets) else len(content)
+            line_content = content[line_start:line_end].decode('utf-8')
+
+            # 尝试获取上下文信息 (所属表名 / 字段名)
+            context_info = "未知位置"
+            
+            # 1. 向上查找最近的二级标题 (## 表名)
+            header_idx = bisect.bisect_left(header_starts, match_start) - 1
+            if header_idx >= 0:
+                header_match = headers[header_idx]
+                # 匹配项位于标题行内时，只取匹配之前的部分作为表名
+                if header_match.end(1) > match_start:
+                    table_name = content[header_match.start(1):match_start].decode('utf-8').strip()
+                else:
+                    table_name = header_match.group(1).decode('utf-8').strip()
+            else:
+                table_name = "未知表"
+            
+            # 2. 尝试从当前行提取第一个单元格 (字段名)
+            field_name = "未知行"
+            row_match = ROW_RE.match(line_content.strip())
+            if row_match:
+                field_name = row_match.group(1).strip()
+            
+            items.append(UntranslatedItem(
+                doc_name, line_num, match_text, match_id,
+                table_name, field_name, category, issue_type
+            ))
+    
+    return items
+
+
+def collect_valid_ids(data):
+    """提取源文件中所有的有效 ID (表 ID 和字段 ID，用于诊断)"""
+    valid_ids = set()
+    
+    if isinstance(data, dict):
+        extra = data.get('gzipExtraInfo', {})
+        if isinstance(extra, str): # 如果还没解压
+             extra = decompress_content(extra)
+        
+        if isinstance(extra, dict):
+            tables = extra.get('tables', [])
+            for tbl in tables:
+                tid = tbl.get('tableId')
+                if tid: valid_ids.add(tid)
+                
+                for fld in tbl.get('fields', []):
+                    fid = fld.get('fieldId')
+                    if fid: valid_ids.add(fid)
+    
+    return valid_ids
+
+
+def diagnose_item(item, valid_ids):
+    """
+    诊断单个未翻译项。
+    返回: (reason, diagnosis, action, severity)
+    """
+    if item.category == '未解析':
+        if item.match_id in valid_ids:
+            reason = "解析器缺陷"
+            diagnosis = f"ID `{item.match_id}` 存在于源数据中，但解析器未能识别。"
+            action = "建议：请检查生成脚本的 ID 映射逻辑。"
+            severity = "🔴 高 (可能是 Bug)"
+        else:
+            reason = "数据缺失"
+            diagnosis = f"ID `{item.match_id}` 在源数据中不存在。"
+            action = (
+                "请执行以下操作：\n"
+                "  1. 打开飞书多维表格\n"
+                f"  2. 定位到 **{item.table_name}**\n"
+                f"  3. 找到 **{item.field_name}** (或对应自动化流程)\n"
+                "  4. 检查是否有显示为 **红色错误** 或 **已删除** 的字段引用\n"
+                "  5. 如果该字段确实存在且正常，请**截图**该字段的配置发送给 AI"
+            )
+            severity = "🟡 中 (可能是已删除字段)"
+    else:
+        reason = item.issue_type
+        diagnosis = f"发现 {item.issue_type}: `{item.text}`"
+        action = "这是脚本生成逻辑不够完善导致的，请告知 AI 优化相关解析函数。"
+        severity = "🔵 低 (可读性问题)"
+    return reason, diagnosis, action, severity
+
+
 def analyze_unknown_keys(data, known_keys, context=""):
     """分析数据中的未知键"""
     unknown = {}
     if isinstance(data, dict):
-        for k, v in data.items():
-            if k not in known_keys:
-                unknown[k] = {
-                    'context': context,
-                    'value_type': type(v).__name__,
-                    'sample': str(v)[:200] if v else "[空]"
-                }
+        # 先用集合差集筛出未知键，只为这少量键构建明细
+        for k in data.keys() - known_keys:
+            v = data[k]
+            unknown[k] = {
+                'context': context,
+                'value_type': type(v).__name__,
+                'sample': str(v)[:200] if v else "[空]"
+            }
     return unknown
 
 
@@ -103,8 +336,9 @@ def main():
     FILE_PATH = find_base_file()
     print(f"\n[1/4] 读取文件: {FILE_PATH}")
     try:
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 以字节读取后一次性解析，省去文本模式的逐块解码与换行转换
+        with open(FILE_PATH, 'rb') as f:
+            data = json.loads(f.read())
     except Exception as e:
         print(f"❌ 文件读取失败: {e}")
         return
@@ -125,7 +359,7 @@ def main():
     
     # 收集所有未知字段
     all_unknown = defaultdict(list)
-    step_type_fields = defaultdict(lambda: defaultdict(int))  # step_type -> {field: count}
+    step_type_fields = defaultdict(Counter)  # step_type -> {field: count}
     
     for wf in workflows:
         # 检查工作流级别
@@ -136,10 +370,16 @@ def main():
         # 解析 Draft
         extra = wf.get('WorkflowExtra', {})
         draft_str = extra.get('Draft', '{}')
-        try:
-            draft = json.loads(draft_str) if isinstance(draft_str, str) else draft_str
-        except:
-            continue
+        if isinstance(draft_str, str):
+            # 不含 steps 的 Draft 没有可统计的步骤，跳过整段 JSON 解析
+            if '"steps"' not in draft_str:
+                continue
+            try:
+                draft = json.loads(draft_str)
+            except:
+                continue
+        else:
+            draft = draft_str
         
         if not isinstance(draft, dict):
             continue
@@ -149,19 +389,22 @@ def main():
         for k, v in draft_unknown.items():
             all_unknown[f"Draft级别.{k}"].append(v)
         
+        # 之后只用到 steps，取出后立即释放 Draft 的其余部分
+        steps = draft.get('steps', [])
+        del draft
+        
         # 检查每个步骤
-        for step in draft.get('steps', []):
+        for step in steps:
             step_type = step.get('type', 'Unknown')
             step_data = step.get('data', {})
             
             # 记录步骤级别的未知字段
-            step_unknown = analyze_unknown_keys(step, {'type', 'id', 'data', 'stepTitle'}, f"步骤 {step_type}")
+            step_unknown = analyze_unknown_keys(step, KNOWN_STEP_LEVEL_KEYS, f"步骤 {step_type}")
             for k, v in step_unknown.items():
                 all_unknown[f"步骤级别.{k}"].append(v)
             
             # 记录步骤数据中的所有字段（用于统计）
-            for k in step_data.keys():
-                step_type_fields[step_type][k] += 1
+            step_type_fields[step_type].update(step_data.keys())
     
     # 生成报告
     print("[4/4] 生成校验报告...")
@@ -169,45 +412,23 @@ def main():
     # 统计数据
     table_count = len(set(wf.get('base_id', '') for wf in workflows))
     workflow_count = len(workflows)
-    unknown_count = sum(1 for fields in step_type_fields.values() 
-                        for f in fields if f not in KNOWN_STEP_KEYS)
+    # 每种步骤类型的未知字段只计算一次（保持字段出现顺序），统计和问题列表共用
+    unknown_fields_by_type = {
+        step_type: [f for f in fields if f not in KNOWN_STEP_KEYS]
+        for step_type, fields in step_type_fields.items()
+    }
+    unknown_count = sum(len(fields) for fields in unknown_fields_by_type.values())
     
-    # 收集具体问题
-    problems = []
-    
-    # 检查未知步骤类型字段
-    for step_type, fields in step_type_fields.items():
-        for field in fields:
-            if field not in KNOWN_STEP_KEYS:
-                problems.append({
-                    'type': '未解析的步骤字段',
-                    'location': f'{step_type} 类型的步骤',
-                    'detail': f'字段 `{field}` 未被解析',
-                    'suggestion': f'告诉 AI："{step_type} 步骤中的 {field} 字段没有被解析"'
-                })
+    # 收集具体问题：每个 (步骤类型, 字段) 只记录一次，说明文字在渲染时才生成
+    problems = [
+        (step_type, field)
+        for step_type, fields in unknown_fields_by_type.items()
+        for field in fields
+    ]
     
     # ========== 扫描生成的文档，检查未翻译的 ID ==========
-    import re
-    import os
-    
-    # 0. 提取源文件中所有的有效 ID (用于诊断)
-    valid_ids = set()
-    
-    # 提取表 ID 和字段 ID
-    if isinstance(data, dict):
-        extra = data.get('gzipExtraInfo', {})
-        if isinstance(extra, str): # 如果还没解压
-             extra = decompress_content(extra)
-        
-        if isinstance(extra, dict):
-            tables = extra.get('tables', [])
-            for tbl in tables:
-                tid = tbl.get('tableId')
-                if tid: valid_ids.add(tid)
-                
-                for fld in tbl.get('fields', []):
-                    fid = fld.get('fieldId')
-                    if fid: valid_ids.add(fid)
+    # 源文件中的有效 ID 只在诊断「未解析」项时才用到，届时再解压提取
+    valid_ids = None
     
     doc_files = [
         "全量字段表.md",
@@ -215,180 +436,97 @@ def main():
         "自动化工作流.md"
     ]
     
-    # 匹配模式：(正则, 类型名称, 是否故意显示)
-    # [未知字段:fldXXX]
-    id_patterns = [
-        (r'\[未知(?:字段|表|选项|引用)[^:\]]*:([^\]]+)\]', '显式未知项', '未解析'),
-        (r'\[已删除的(?:字段|表)[^:\]]*:([^\]]+)\]', '已删除引用', '未解析'),
-        (r'\[步骤\d+的(?:字段|formula|结果)\]', '模糊引用', '可读性差'),
-        (r'\[步骤\d+的循环当前记录\]', '模糊循环', '可读性差'),
-        (r'default_url":\s*"{引用}"', '模糊动作配置', '信息丢失'),
-        (r'\b(is|isNot|contains|doesNotContain|isEmpty|isNotEmpty)\b', '未翻译操作符', '英文残留')
-    ]
+    # 各文档相互独立：文档较大时分发到多个进程并行扫描，结果按文档顺序合并
+    doc_paths = [p for p in doc_files if os.path.exists(p)]
+    if len(doc_paths) > 1 and sum(os.path.getsize(p) for p in doc_paths) > PARALLEL_SCAN_THRESHOLD:
+        try:
+            with ProcessPoolExecutor(max_workers=len(doc_paths)) as executor:
+                doc_results = list(executor.map(scan_document, doc_paths))
+        except (OSError, BrokenProcessPool):
+            # 受限环境下无法创建子进程时退回串行扫描
+            doc_results = [scan_document(p) for p in doc_paths]
+    else:
+        doc_results = [scan_document(p) for p in doc_paths]
     
-    untranslated_items = []
+    untranslated_items = [item for items in doc_results for item in items]
     
-    for doc_path in doc_files:
-        if not os.path.exists(doc_path):
-            continue
+    # 逐行直接写入文件，不在内存中拼接整份报告
+    with open(OUTPUT_PATH, 'w', encoding='utf-8') as out:
+        def emit(line):
+            out.write(line)
+            out.write('\n')
         
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        doc_name = os.path.basename(doc_path)
-        
-        for pattern, issue_type, category in id_patterns:
-            for match in re.finditer(pattern, content):
-                match_text = match.group(0) # 完整标签
-                # 对于某些正则，可能没有 group(1)
-                match_id = match.group(1) if match.lastindex and match.lastindex >= 1 else match_text
-                match_start = match.start()
-                
-                # 找到行号
-                line_num = content[:match_start].count('\n') + 1
-
-                # 获取该行内容
-                line_start = content.rfind('\n', 0, match_start) + 1
-                line_end = content.find('\n', match_start)
-                if line_end == -1: line_end = len(content)
-                line_content = content[line_start:line_end]
-
-                # 尝试获取上下文信息 (所属表名 / 字段名)
-                context_info = "未知位置"
-                
-                # 1. 向上查找最近的二级标题 (## 表名)
-                header_match = None
-                for m in re.finditer(r'^##\s+(.*?)$', content[:match_start], re.MULTILINE):
-                    header_match = m
-                
-                table_name = header_match.group(1).strip() if header_match else "未知表"
-                
-                # 2. 尝试从当前行提取第一个单元格 (字段名)
-                field_name = "未知行"
-                row_match = re.match(r'^\|?\s*\*{0,2}(.*?)\*{0,2}\s*\|', line_content.strip())
-                if row_match:
-                    field_name = row_match.group(1).strip()
-                
-                context_str = f"表: {table_name} / 行: {field_name}"
-                
-                # 诊断原因
-                diagnosis = ""
-                action = ""
-                
-                if category == '未解析':
-                    if match_id in valid_ids:
-                        reason = "解析器缺陷"
-                        diagnosis = f"ID `{match_id}` 存在于源数据中，但解析器未能识别。"
-                        action = "建议：请检查生成脚本的 ID 映射逻辑。"
-                        severity = "🔴 高 (可能是 Bug)"
-                    else:
-                        reason = "数据缺失"
-                        diagnosis = f"ID `{match_id}` 在源数据中不存在。"
-                        action = (
-                            "请执行以下操作：\n"
-                            "  1. 打开飞书多维表格\n"
-                            f"  2. 定位到 **{table_name}**\n"
-                            f"  3. 找到 **{field_name}** (或对应自动化流程)\n"
-                            "  4. 检查是否有显示为 **红色错误** 或 **已删除** 的字段引用\n"
-                            "  5. 如果该字段确实存在且正常，请**截图**该字段的配置发送给 AI"
-                        )
-                        severity = "🟡 中 (可能是已删除字段)"
-                else:
-                    reason = issue_type
-                    diagnosis = f"发现 {issue_type}: `{match_text}`"
-                    action = "这是脚本生成逻辑不够完善导致的，请告知 AI 优化相关解析函数。"
-                    severity = "🔵 低 (可读性问题)"
-
-                untranslated_items.append({
-                    'doc': doc_name,
-                    'line': line_num,
-                    'text': match_text,
-                    'id': match_id,
-                    'context': context_str,
-                    'reason': reason,
-                    'diagnosis': diagnosis,
-                    'action': action,
-                    'severity': severity
-                })
+        emit("# 完整性校验报告\n")
+        emit(f"> 生成时间: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        emit("---\n")
     
-    lines = []
-    lines.append("# 完整性校验报告\n")
-    lines.append(f"> 生成时间: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    lines.append("---\n")
+        # 校验结果摘要
+        emit("## 📊 校验结果\n")
+        emit("| 项目 | 结果 |")
+        emit("|------|------|")
+        emit(f"| 工作流解析 | ✅ {workflow_count} 个工作流已解析 |")
     
-    # 校验结果摘要
-    lines.append("## 📊 校验结果\n")
-    lines.append("| 项目 | 结果 |")
-    lines.append("|------|------|")
-    lines.append(f"| 工作流解析 | ✅ {workflow_count} 个工作流已解析 |")
-    
-    if unknown_count == 0:
-        lines.append("| 字段覆盖率 | ✅ 100% 全部覆盖 |")
-    else:
-        coverage = 100 - (unknown_count / max(1, sum(len(f) for f in step_type_fields.values())) * 100)
-        lines.append(f"| 字段覆盖率 | ⚠️ {coverage:.1f}% (有 {unknown_count} 个字段未解析) |")
+        if unknown_count == 0:
+            emit("| 字段覆盖率 | ✅ 100% 全部覆盖 |")
+        else:
+            coverage = 100 - (unknown_count / max(1, sum(len(f) for f in step_type_fields.values())) * 100)
+            emit(f"| 字段覆盖率 | ⚠️ {coverage:.1f}% (有 {unknown_count} 个字段未解析) |")
     
-    # 翻译覆盖率
-    if len(untranslated_items) == 0:
-        lines.append("| ID翻译 | ✅ 100% 已翻译 |")
-    else:
-        lines.append(f"| ID翻译 | ⚠️ 发现 {len(untranslated_items)} 个未翻译ID |")
+        # 翻译覆盖率
+        if len(untranslated_items) == 0:
+            emit("| ID翻译 | ✅ 100% 已翻译 |")
+        else:
+            emit(f"| ID翻译 | ⚠️ 发现 {len(untranslated_items)} 个未翻译ID |")
     
-    lines.append("")
+        emit("")
     
-    # 问题列表
-    if problems:
-        lines.append("---\n")
-        lines.append("## ⚠️ 发现的问题 (需人工介入)\n")
+        # 问题列表
+        if problems:
+            emit("---\n")
+            emit("## ⚠️ 发现的问题 (需人工介入)\n")
         
-        for i, p in enumerate(problems[:5], 1):  # 最多显示5个
-            lines.append(f"### 问题 {i}: {p['type']}\n")
-            lines.append(f"- **位置**: {p['location']}")
-            lines.append(f"- **详情**: {p['detail']}")
-            lines.append(f"- **如何修复**: {p['suggestion']}\n")
+            for i, (step_type, field) in enumerate(problems[:5], 1):  # 最多显示5个
+                emit(f"### 问题 {i}: 未解析的步骤字段\n")
+                emit(f"- **位置**: {step_type} 类型的步骤")
+                emit(f"- **详情**: 字段 `{field}` 未被解析")
+                emit(f"- **如何修复**: 告诉 AI：\"{step_type} 步骤中的 {field} 字段没有被解析\"\n")
         
-        if len(problems) > 5:
-            lines.append(f"\n*还有 {len(problems) - 5} 个类似问题...*\n")
+            if len(problems) > 5:
+                emit(f"\n*还有 {len(problems) - 5} 个类似问题...*\n")
     
-    # 生成问题列表
-    if untranslated_items:
-        lines.append("---\n")
-        lines.append("## ⚠️ 发现的问题 (需人工介入)\n")
+        # 生成问题列表
+        if untranslated_items:
+            emit("---\n")
+            emit("## ⚠️ 发现的问题 (需人工介入)\n")
         
-        for i, item in enumerate(untranslated_items[:10], 1):
-            # 构建可点击链接 (VS Code 友好格式)
-            file_link = f"[{item['doc']}:{item['line']}](./{item['doc']}#L{item['line']})"
+            for i, item in enumerate(untranslated_items[:10], 1):
+                if item.category == '未解析' and valid_ids is None:
+                    valid_ids = collect_valid_ids(data)
+                reason, diagnosis, action, severity = diagnose_item(item, valid_ids)
+                fields = item._asdict()
+                fields.update(i=i, reason=reason, diagnosis=diagnosis, action=action)
+                out.write(UNTRANSLATED_ITEM_TEMPLATE.format_map(fields))
             
-            lines.append(f"### 问题 {i}: {item['reason']}\n")
-            lines.append(f"- **错误位置**: {file_link}")
-            lines.append(f"- **精确定位**: {item['context']}")
-            lines.append(f"- **未解析内容**: `{item['text']}`")
-            lines.append(f"- **诊断结果**: {item['diagnosis']}")
-            lines.append(f"- **建议操作**: \n{item['action']}\n")
-            
-        if len(untranslated_items) > 10:
-             lines.append(f"\n*还有 {len(untranslated_items) - 10} 个类似问题...*\n")
+            if len(untranslated_items) > 10:
+                 emit(f"\n*还有 {len(untranslated_items) - 10} 个类似问题...*\n")
 
-    else:
-        # 如果没有问题
-        lines.append("---\n")
-        lines.append("## ✅ 解析完成\n")
-        lines.append("所有内容均已成功解析，无需额外处理。\n")
+        else:
+            # 如果没有问题
+            emit("---\n")
+            emit("## ✅ 解析完成\n")
+            emit("所有内容均已成功解析，无需额外处理。\n")
         
-    # 使用说明
-    lines.append("---\n")
-    lines.append("## 💬 如果您发现其他问题\n")
-    lines.append("在阅读生成的文档时，如果看到以下情况：\n")
-    lines.append("- 显示为 `fldXXX` 或 `tblXXX` 格式的内容")
-    lines.append("- 显示为 `未知类型(数字)` 的字段类型")
-    lines.append("- 显示为英文的操作或字段\n")
-    lines.append("**请直接告诉 AI** 问题出现的位置，例如：\n")
-    lines.append('> "自动化工作流第 XX 行有个字段显示为原始 ID，帮我翻译一下"\n')
-    lines.append("AI 会自动修复并重新生成文档。\n")
+        # 使用说明
+        emit("---\n")
+        emit("## 💬 如果您发现其他问题\n")
+        emit("在阅读生成的文档时，如果看到以下情况：\n")
+        emit("- 显示为 `fldXXX` 或 `tblXXX` 格式的内容")
+        emit("- 显示为 `未知类型(数字)` 的字段类型")
+        emit("- 显示为英文的操作或字段\n")
+        emit("**请直接告诉 AI** 问题出现的位置，例如：\n")
+        emit('> "自动化工作流第 XX 行有个字段显示为原始 ID，帮我翻译一下"\n')
+        out.write("AI 会自动修复并重新生成文档。\n")  # 最后一行之后不追加换行
     
-    # 写入文件
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
     
     print(f"\n✅ 校验报告已生成: {OUTPUT_PATH}")
     print("=" * 50)
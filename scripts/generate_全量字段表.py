@@ -14,31 +14,16 @@
 """
 
 import json
-import base64
-import gzip
-import io
 import datetime
+import io
 import re
+from operator import itemgetter
 
-import glob
-import sys
-import os
+from base_common import find_base_file, decompress_content, build_name_registry, render_tables
 
 # ========== 配置 ==========
 OUTPUT_PATH = "全量字段表.md"
 
-def find_base_file():
-    """在当前目录下查找 .base 文件"""
-    base_files = glob.glob("*.base")
-    if not base_files:
-        print("❌ 错误：当前目录下未找到 .base 文件，请先导出并上传您的飞书多维表格 .base 文件到本目录。")
-        sys.exit(1)
-    elif len(base_files) > 1:
-        print(f"❌ 错误：当前目录下找到多个 .base 文件 {base_files}，请仅保留一个需要解析的文件。")
-        sys.exit(1)
-    
-    return base_files[0]
-
 # 字段类型映射
 FIELD_TYPES = {
     1: "文本", 2: "数字", 3: "单选", 4: "多选", 5: "日期",
@@ -49,73 +34,25 @@ FIELD_TYPES = {
     1005: "自动编号", 3001: "按钮"
 }
 
+# 公式解析使用的正则（模块加载时预编译一次）
+# 表引用: bitable::$table[tblXXX]
+TABLE_REF_RE = re.compile(r'bitable::\$table\[(.*?)\]')
+# 字段引用: $field[fldXXX] 或 $column[fldXXX]
+FIELD_REF_RE = re.compile(r'\$(?:field|column)\[(.*?)\]')
+# FILTER(...) 内的条件表达式
+FILTER_RE = re.compile(r'\.FILTER\((.*?)\)', re.DOTALL)
+# 等于/不等于条件: CurrentValue.$column[fldXXX] = ... 或 != ...
+# 字段 ID 不跨过 ]；右侧值止于 &、|、,、) 或下一个 CurrentValue.，不会吞掉后续条件
+FILTER_COND_RE = re.compile(r'CurrentValue\.\$(?:column|field)\[([^\]]*)\]\s*(!=|=)\s*((?:(?!CurrentValue\.)[^&|,\)])+)')
 
-def decompress_content(compressed_content):
-    """解压 gzip + base64 编码的内容"""
-    try:
-        if isinstance(compressed_content, str):
-            compressed_bytes = base64.b64decode(compressed_content)
-        else:
-            return None
-        with gzip.GzipFile(fileobj=io.BytesIO(compressed_bytes)) as gz:
-            return json.loads(gz.read().decode('utf-8'))
-    except Exception as e:
-        print(f"解压失败: {e}")
-        return None
-
-
-def build_name_registry(snapshot):
-    """
-    从快照中构建表名和字段名的映射表。
-    返回: (table_map, field_map, all_tables)
-    - table_map: {table_id: table_name}
-    - field_map: {(table_id, field_id): field_name}
-    - all_tables: [table_dict, ...]
-    """
-    table_map = {}
-    field_map = {}
-    all_tables = []
-
-    for item in snapshot:
-        if 'schema' not in item:
-            continue
-        
-        schema = item['schema']
-        
-        # 首先从 tableMap 获取表名（这里通常有完整的表名）
-        for tid, tinfo in schema.get('tableMap', {}).items():
-            if isinstance(tinfo, dict) and tinfo.get('name'):
-                table_map[tid] = tinfo['name']
-        
-        # 然后处理 data 中的表结构
-        if 'data' not in schema:
-            continue
-            
-        data = schema['data']
-        tables = data.get('tables', [])
-        if 'table' in data:
-            tables.append(data['table'])
-        
-        for table in tables:
-            if not isinstance(table, dict):
-                continue
-            
-            all_tables.append(table)
-            table_id = table.get('meta', {}).get('id')
-            table_name = table.get('meta', {}).get('name')
-            
-            # 只有当 tableMap 中没有这个表时才使用 meta.name
-            if table_id and table_id not in table_map:
-                table_map[table_id] = table_name or table_id
-                
-            # 提取字段名
-            if table_id:
-                for field_id, field_def in table.get('fieldMap', {}).items():
-                    field_name = field_def.get('name') or field_id
-                    field_map[(table_id, field_id)] = field_name
-
-    return table_map, field_map, all_tables
+# 单个文档内公式翻译缓存 (formula_cache) 的条目上限，由 generate_document 为每次生成新建
+FORMULA_CACHE_MAXSIZE = 4096
 
+# 每张字段表的表头与对齐行，固定文本，整段一次写入
+FIELD_TABLE_HEADER = (
+    "| 字段名称 | 字段类型 | 是否AI字段 | 业务描述 | 完整配置/公式 |\n"
+    "| :--- | :--- | :--- | :--- | :--- |\n"
+)
 
 
 def get_field_type_name(type_id):
@@ -123,13 +60,20 @@ def get_field_type_name(type_id):
     return FIELD_TYPES.get(type_id, f"未知类型({type_id})")
 
 
-def translate_formula(formula, current_table_id, table_map, field_map):
+def translate_formula(formula, current_table_id, table_map, field_map, field_by_id, formula_cache=None):
     """
     将公式中的 ID 翻译为可读的「表名」.「字段名」格式。
+    传入 formula_cache 时，同一 (公式, 当前表) 只翻译一次；该缓存只对同一组映射表有效。
     """
     if not formula:
         return ""
     
+    cache_key = (formula, current_table_id)
+    if formula_cache is not None:
+        cached = formula_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     # 替换表引用: bitable::$table[tblXXX] -> 「表名」
     def replace_table(match):
         tid = match.group(1)
@@ -139,7 +83,9 @@ def translate_formula(formula, current_table_id, table_map, field_map):
         # 未找到时返回友好标记
         return f"「[已删除的表:{tid}]」"
     
-    formula = re.sub(r'bitable::\$table\[(.*?)\]', replace_table, formula)
+    # 没有跨表引用的公式占多数，子串判断通过后才跑正则替换
+    if 'bitable::$table[' in formula:
+        formula = TABLE_REF_RE.sub(replace_table, formula)
     
     # 替换字段引用: $field[fldXXX] 或 $column[fldXXX] -> 「字段名」
     def replace_field(match):
@@ -149,29 +95,30 @@ def translate_formula(formula, current_table_id, table_map, field_map):
         if fname:
             return f"「{fname}」"
         # 再尝试所有表
-        for (tid, f_id), name in field_map.items():
-            if f_id == fid:
-                return f"「{name}」"
+        fname = field_by_id.get(fid)
+        if fname:
+            return f"「{fname}」"
         # 未找到时返回友好标记
         return f"「[未知字段:{fid}]」"
     
-    formula = re.sub(r'\$(?:field|column)\[(.*?)\]', replace_field, formula)
+    formula = FIELD_REF_RE.sub(replace_field, formula)
     
     # 清理 bitable:: 前缀
     formula = formula.replace("bitable::", "")
     
+    if formula_cache is not None and len(formula_cache) < FORMULA_CACHE_MAXSIZE:
+        formula_cache[cache_key] = formula
     return formula
 
 
-def extract_ai_config(field_def, field_map):
+def extract_ai_config(field_def, field_by_id):
     """
     提取 AI 字段的配置信息，包括提示词。
     返回: (is_ai_field, ai_description)
     """
     # 方式1: ext.ai（飞书内置 AI）
-    ext_ai = field_def.get('ext', {})
-    if ext_ai:
-        ext_ai = ext_ai.get('ai')
+    ext = field_def.get('ext')
+    ext_ai = ext.get('ai') if ext else None
     if ext_ai:
         prompts = ext_ai.get('prompt', [])
         prompt_parts = []
@@ -182,67 +129,52 @@ def extract_ai_config(field_def, field_map):
                 val = p.get('value', {})
                 if val.get('valueType') == 'field':
                     fid = val.get('value', {}).get('id')
-                    fname = fid
-                    for (tid, f_id), name in field_map.items():
-                        if f_id == fid:
-                            fname = name
-                            break
+                    fname = field_by_id.get(fid, fid)
                     prompt_parts.append(f"{{字段:{fname}}}")
         return True, "提示词: " + "".join(prompt_parts)
     
     # 方式2: exInfo.customOpenTypeData（自定义/内置 AI）
-    ex_info = field_def.get('exInfo', {})
+    # 绝大多数字段没有这两层配置，逐层取值并尽早返回
+    ex_info = field_def.get('exInfo')
     if not ex_info:
         return False, ""
     
-    custom_data = ex_info.get('customOpenTypeData', {})
+    custom_data = ex_info.get('customOpenTypeData')
     if not custom_data:
         return False, ""
     
-    # 检查是否是 AI 扩展（多种检测方式）
-    is_ai = False
-    ai_name = ""
-    prompt_text = ""
-    source_field = ""
+    config = custom_data.get('fieldConfigValue') or {}
     
+    # 检查是否是 AI 扩展（多种检测方式）
     # 方式2a: innerType == 'ai_extract' 或有 aiPrompt
-    inner_type = custom_data.get('innerType', '')
-    if inner_type == 'ai_extract' or 'aiPrompt' in custom_data.get('fieldConfigValue', {}):
-        is_ai = True
+    is_ai = custom_data.get('innerType') == 'ai_extract' or 'aiPrompt' in config
     
     # 方式2b: extensionType == 'field_faas' 且 category 包含 'Bitable_AI_Menu'
-    extension_type = custom_data.get('extensionType', '')
-    categories = custom_data.get('category', [])
-    if extension_type == 'field_faas' and 'Bitable_AI_Menu' in categories:
+    ai_name = ""
+    if custom_data.get('extensionType') == 'field_faas' and 'Bitable_AI_Menu' in custom_data.get('category', []):
         is_ai = True
         ai_name = custom_data.get('name', 'AI 扩展')
     
     # 方式2c: 有 aiPaymentInfo（表示使用了 AI 付费功能）
-    if ex_info.get('aiPaymentInfo', {}).get('enableAIPayment'):
-        is_ai = True
+    if not is_ai:
+        payment_info = ex_info.get('aiPaymentInfo')
+        is_ai = bool(payment_info and payment_info.get('enableAIPayment'))
     
     if not is_ai:
         return False, ""
     
     # 提取配置信息
-    config = custom_data.get('fieldConfigValue', {})
-    form_data = config.get('formData', {})
+    form_data = config.get('formData') or {}
     
-    # 提取提示词（多种可能的字段名）
-    prompt_text = form_data.get('promptEdit', '')  # 豆包图片理解
-    if not prompt_text:
-        prompt_text = form_data.get('content', '')  # 其他 AI
-    if not prompt_text:
-        prompt_text = form_data.get('custom_rules', '')  # 规则
+    # 提取提示词（多种可能的字段名）：豆包图片理解 / 其他 AI / 规则
+    prompt_text = form_data.get('promptEdit') or form_data.get('content') or form_data.get('custom_rules')
     
     # 提取来源字段
     source_obj = form_data.get('source', {}) or form_data.get('choiceColumn', {})
     source_id = source_obj.get('id', '') if isinstance(source_obj, dict) else ''
+    source_field = ""
     if source_id:
-        for (tid, f_id), name in field_map.items():
-            if f_id == source_id:
-                source_field = name
-                break
+        source_field = field_by_id.get(source_id, '')
         if not source_field:
             source_field = source_id
     
@@ -269,9 +201,24 @@ def extract_ai_config(field_def, field_map):
     return True, " | ".join(desc_parts) if desc_parts else "AI 字段"
 
 
-def extract_filter_conditions_from_formula(formula, current_table_id, table_map, field_map):
+def extract_filter_conditions_from_formula(formula, current_table_id, table_map, field_map, field_by_id, formula_cache):
     """
     从公式中提取 FILTER 条件，返回可读描述。
+    同一 FILTER 中混用 != 与 =，或以 OR(…, …) / || 连接多个条件时，各条件分别识别:
+
+    >>> names = {('tblX', 'fldA'): 'A', ('tblX', 'fldB'): 'B'}
+    >>> extract_filter_conditions_from_formula(
+    ...     '.FILTER(CurrentValue.$column[fldA] != 1 && CurrentValue.$column[fldB] = 2)',
+    ...     'tblX', {}, names, {}, None)
+    '「B」= 2 且 「A」≠ 1'
+    >>> extract_filter_conditions_from_formula(
+    ...     '.FILTER(OR(CurrentValue.$column[fldA]=1, CurrentValue.$column[fldB]!=2))',
+    ...     'tblX', {}, names, {}, None)
+    '「A」= 1 且 「B」≠ 2'
+    >>> extract_filter_conditions_from_formula(
+    ...     '.FILTER(CurrentValue.$column[fldB]!=2 || CurrentValue.$column[fldA]=1)',
+    ...     'tblX', {}, names, {}, None)
+    '「A」= 1 且 「B」≠ 2'
     """
     if not formula:
         return ""
@@ -279,228 +226,301 @@ def extract_filter_conditions_from_formula(formula, current_table_id, table_map,
     conditions = []
     
     # 提取 FILTER 内的条件
-    filter_matches = re.findall(r'\.FILTER\((.*?)\)', formula, re.DOTALL)
+    filter_matches = FILTER_RE.findall(formula)
     for filter_expr in filter_matches:
-        # 等于条件
-        eq_matches = re.findall(r'CurrentValue\.\$(?:column|field)\[(.*?)\]\s*=\s*([^&\)]+)', filter_expr)
-        for left_fid, right_expr in eq_matches:
+        # 一次扫描取出等于和不等于条件（右侧值有界，相邻条件不会被吞掉）；按先等于、后不等于输出
+        eq_conditions = []
+        neq_conditions = []
+        for left_fid, op, right_expr in FILTER_COND_RE.findall(filter_expr):
             left_fname = field_map.get((current_table_id, left_fid), left_fid)
             # 尝试全局查找
             if left_fname == left_fid:
-                for (tid, fid), name in field_map.items():
-                    if fid == left_fid:
-                        left_fname = name
-                        break
-            right_translated = translate_formula(right_expr.strip(), current_table_id, table_map, field_map)
-            conditions.append(f"「{left_fname}」= {right_translated}")
-        
-        # 不等于条件
-        neq_matches = re.findall(r'CurrentValue\.\$(?:column|field)\[(.*?)\]\s*!=\s*([^&\)]+)', filter_expr)
-        for left_fid, right_expr in neq_matches:
-            left_fname = field_map.get((current_table_id, left_fid), left_fid)
-            if left_fname == left_fid:
-                for (tid, fid), name in field_map.items():
-                    if fid == left_fid:
-                        left_fname = name
-                        break
-            right_translated = translate_formula(right_expr.strip(), current_table_id, table_map, field_map)
-            conditions.append(f"「{left_fname}」≠ {right_translated}")
+                left_fname = field_by_id.get(left_fid, left_fid)
+            right_translated = translate_formula(right_expr.strip(), current_table_id, table_map, field_map, field_by_id, formula_cache)
+            if op == "!=":
+                neq_conditions.append(f"「{left_fname}」≠ {right_translated}")
+            else:
+                eq_conditions.append(f"「{left_fname}」= {right_translated}")
+        conditions.extend(eq_conditions)
+        conditions.extend(neq_conditions)
     
     return " 且 ".join(conditions) if conditions else ""
 
 
-def extract_field_config(field_def, current_table_id, table_map, field_map):
+def describe_formula_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """公式: 翻译后的公式文本"""
+    formula = prop.get('formula', '')
+    translated = translate_formula(formula, current_table_id, table_map, field_map, field_by_id, formula_cache)
+    return f"`{translated}`"
+
+
+def describe_option_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """单选/多选: 选项列表或选项同步来源"""
+    # 检查是否有选项同步规则
+    options_rule = prop.get('optionsRule')
+    if options_rule and options_rule.get('targetTable'):
+        target_tid = options_rule.get('targetTable')
+        target_fid = options_rule.get('targetField')
+        target_tname = table_map.get(target_tid, target_tid)
+        target_fname = field_map.get((target_tid, target_fid), target_fid)
+        return f"选项同步自「{target_tname}」的「{target_fname}」"
+    options = prop.get('options', [])
+    option_names = [o.get('name', '') for o in options]
+    return f"选项: {', '.join(option_names)}"
+
+
+def describe_lookup_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """查找引用: 目标表/字段及筛选条件；没有目标表时返回 None，按通用配置展示"""
+    filter_info = prop.get('filterInfo', {})
+    target_tid = filter_info.get('targetTable')
+    target_fid = prop.get('targetField')
+    if not target_tid:
+        return None
+    
+    # 翻译目标表名，未找到则标记为已删除
+    target_tname = table_map.get(target_tid)
+    if not target_tname:
+        target_tname = f"[已删除的表:{target_tid}]"
+    
+    # 翻译目标字段名，未找到则标记为已删除
+    target_fname = field_map.get((target_tid, target_fid))
+    if not target_fname:
+        # 尝试全局查找
+        target_fname = field_by_id.get(target_fid)
+    if not target_fname:
+        target_fname = f"[已删除的字段:{target_fid}]"
+    
+    # 基本信息
+    result = f"查找引用自「{target_tname}」的「{target_fname}」"
+    
+    # 提取公式中的筛选条件
+    lookup_formula = prop.get('formula', '')
+    if lookup_formula:
+        # 提取 FILTER 条件
+        filter_conds = extract_filter_conditions_from_formula(lookup_formula, current_table_id, table_map, field_map, field_by_id, formula_cache)
+        if filter_conds:
+            result += f"<br>筛选条件: {filter_conds}"
+    
+    return result
+
+
+def describe_link_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """关联/双向关联: 关联目标表；没有目标表时返回 None，按通用配置展示"""
+    target_tid = prop.get('tableId')
+    if not target_tid:
+        return None
+    target_tname = table_map.get(target_tid)
+    if not target_tname:
+        target_tname = f"[已删除的表:{target_tid}]"
+    return f"关联到「{target_tname}」"
+
+
+def describe_auto_number_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """自动编号: 编号规则"""
+    rules = prop.get('ruleFieldOptions', [])
+    rule_desc = []
+    for rule in rules:
+        r_type = rule.get('type')
+        r_val = rule.get('value', '')
+        if r_type == 1: # 创建时间
+            rule_desc.append(f"{{创建时间:{r_val}}}")
+        elif r_type == 2: # 固定字符
+            rule_desc.append(f"\"{r_val}\"")
+        elif r_type == 3: # 自增数字
+            rule_desc.append(f"{{自增数字:{r_val}位}}")
+        else:
+            rule_desc.append(f"{{未知规则:{r_val}}}")
+    
+    if rule_desc:
+        return f"编号规则: {' + '.join(rule_desc)}"
+    return "自动编号 (无规则)"
+
+
+def describe_date_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """日期: 显示格式与自动填入"""
+    date_fmt = prop.get('dateFormat', '')
+    time_fmt = prop.get('timeFormat', '')
+    auto_fill = prop.get('autoFill', False)
+    
+    parts = []
+    full_fmt = f"{date_fmt} {time_fmt}".strip()
+    if full_fmt:
+        parts.append(f"格式: {full_fmt}")
+    if auto_fill:
+        parts.append("自动填入创建时间")
+        
+    return " | ".join(parts) if parts else "日期"
+
+
+def describe_number_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """数字: 数字格式"""
+    formatter = prop.get('formatter', '')
+    if formatter:
+        return f"数字格式: {formatter}"
+    return "数字"
+
+
+def describe_button_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """按钮: 标题与触发方式"""
+    btn_cfg = prop.get('button', {})
+    trigger_cfg = prop.get('trigger', {})
+    
+    title = btn_cfg.get('title', '未命名按钮')
+    # color = btn_cfg.get('color') # 1: blue, etc.
+    
+    trigger_desc = "无触发"
+    if trigger_cfg.get('type') == 0:
+        trigger_desc = "触发自动化/脚本"
+        
+    return f"按钮: [{title}] ({trigger_desc})"
+
+
+def describe_attachment_config(prop, current_table_id, table_map, field_map, field_by_id, formula_cache):
+    """附件"""
+    return "允许上传附件"
+
+
+def iter_repr_parts(obj):
+    """按顺序逐段产出 repr(obj) 的文本，dict/list 逐项展开，便于提前停止"""
+    if type(obj) is dict:
+        yield '{'
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                yield ', '
+            yield from iter_repr_parts(key)
+            yield ': '
+            yield from iter_repr_parts(value)
+        yield '}'
+    elif type(obj) is list:
+        yield '['
+        for i, value in enumerate(obj):
+            if i:
+                yield ', '
+            yield from iter_repr_parts(value)
+        yield ']'
+    else:
+        yield repr(obj)
+
+
+def describe_other_config(prop, limit=200):
+    """其他有配置的字段: 截断显示原始配置"""
+    if not prop:
+        return "-"
+    # 简化显示，避免过长：只生成 repr 的前 limit 个字符，不格式化整份大配置
+    parts = []
+    size = 0
+    for part in iter_repr_parts(prop):
+        parts.append(part)
+        size += len(part)
+        if size > limit:
+            break
+    prop_str = "".join(parts)
+    if len(prop_str) > limit:
+        prop_str = prop_str[:limit] + "..."
+    return prop_str
+
+
+# 字段类型 -> 配置描述函数；未登记或函数返回 None 的按通用配置展示
+FIELD_CONFIG_HANDLERS = {
+    20: describe_formula_config,
+    3: describe_option_config,
+    4: describe_option_config,
+    19: describe_lookup_config,
+    18: describe_link_config,
+    21: describe_link_config,
+    1005: describe_auto_number_config,
+    5: describe_date_config,
+    2: describe_number_config,
+    3001: describe_button_config,
+    17: describe_attachment_config,
+}
+
+
+def extract_field_config(field_def, current_table_id, table_map, field_map, field_by_id, formula_cache):
     """
     提取字段的配置信息（公式、选项、查找引用等）。
     返回: (config_text, is_ai, ai_desc)
     """
-    field_type = field_def.get('type')
     prop = field_def.get('property', {})
     
     # 检查是否是 AI 字段
-    is_ai, ai_desc = extract_ai_config(field_def, field_map)
-    
-    # 公式
-    if field_type == 20:
-        formula = prop.get('formula', '')
-        translated = translate_formula(formula, current_table_id, table_map, field_map)
-        return f"`{translated}`", is_ai, ai_desc
-    
-    # 单选/多选
-    if field_type in [3, 4]:
-        options = prop.get('options', [])
-        option_names = [o.get('name', '') for o in options]
-        # 检查是否有选项同步规则
-        options_rule = prop.get('optionsRule', {})
-        if options_rule.get('targetTable'):
-            target_tid = options_rule.get('targetTable')
-            target_fid = options_rule.get('targetField')
-            target_tname = table_map.get(target_tid, target_tid)
-            target_fname = field_map.get((target_tid, target_fid), target_fid)
-            return f"选项同步自「{target_tname}」的「{target_fname}」", is_ai, ai_desc
-        return f"选项: {', '.join(option_names)}", is_ai, ai_desc
-    
-    # 查找引用
-    if field_type == 19:
-        filter_info = prop.get('filterInfo', {})
-        target_tid = filter_info.get('targetTable')
-        target_fid = prop.get('targetField')
-        if target_tid:
-            # 翻译目标表名，未找到则标记为已删除
-            target_tname = table_map.get(target_tid)
-            if not target_tname:
-                target_tname = f"[已删除的表:{target_tid}]"
-            
-            # 翻译目标字段名，未找到则标记为已删除
-            target_fname = field_map.get((target_tid, target_fid))
-            if not target_fname:
-                # 尝试全局查找
-                for (tid, fid), name in field_map.items():
-                    if fid == target_fid:
-                        target_fname = name
-                        break
-            if not target_fname:
-                target_fname = f"[已删除的字段:{target_fid}]"
-            
-            # 基本信息
-            result = f"查找引用自「{target_tname}」的「{target_fname}」"
-            
-            # 提取公式中的筛选条件
-            lookup_formula = prop.get('formula', '')
-            if lookup_formula:
-                # 提取 FILTER 条件
-                filter_conds = extract_filter_conditions_from_formula(lookup_formula, current_table_id, table_map, field_map)
-                if filter_conds:
-                    result += f"<br>筛选条件: {filter_conds}"
-            
-            return result, is_ai, ai_desc
-    
-    # 关联/双向关联
-    if field_type in [18, 21]:
-        target_tid = prop.get('tableId')
-        if target_tid:
-            target_tname = table_map.get(target_tid)
-            if not target_tname:
-                target_tname = f"[已删除的表:{target_tid}]"
-            return f"关联到「{target_tname}」", is_ai, ai_desc
-    
-    # 自动编号
-    if field_type == 1005:
-        rules = prop.get('ruleFieldOptions', [])
-        rule_desc = []
-        for rule in rules:
-            r_type = rule.get('type')
-            r_val = rule.get('value', '')
-            if r_type == 1: # 创建时间
-                rule_desc.append(f"{{创建时间:{r_val}}}")
-            elif r_type == 2: # 固定字符
-                rule_desc.append(f"\"{r_val}\"")
-            elif r_type == 3: # 自增数字
-                rule_desc.append(f"{{自增数字:{r_val}位}}")
-            else:
-                rule_desc.append(f"{{未知规则:{r_val}}}")
+    is_ai, ai_desc = extract_ai_config(field_def, field_by_id)
+    
+    # 按字段类型一次查表分派
+    config = None
+    handler = FIELD_CONFIG_HANDLERS.get(field_def.get('type'))
+    if handler:
+        config = handler(prop, current_table_id, table_map, field_map, field_by_id, formula_cache)
+    if config is None:
+        config = describe_other_config(prop)
+    
+    return config, is_ai, ai_desc
+
+
+def render_table(table, table_map, field_map, field_by_id, formula_cache):
+    """渲染单张表的字段表格，只依赖该表和名称映射，可在子进程中执行"""
+    buf = io.StringIO()
+    w = buf.write
+    table_id = table.get('meta', {}).get('id')
+    table_name = table_map.get(table_id, table_id)
+    field_map_data = table.get('fieldMap', {})
+    
+    w(f"## 📊 {table_name}\n")
+    w(f"- 表 ID: `{table_id}`\n")
+    w(f"- 字段数量: {len(field_map_data)}\n\n")
+    
+    w(FIELD_TABLE_HEADER)
+    
+    # 按字段名排序
+    sorted_fields = [(field_def.get('name', ''), field_id, field_def) for field_id, field_def in field_map_data.items()]
+    sorted_fields.sort(key=itemgetter(0))
+    
+    # 逐字段循环是纯 Python 的热点：把每个字段都要用到的全局对象绑定为局部变量，省去重复的全局查找
+    type_name = FIELD_TYPES.get  # 绑定方法直接查 dict；实测比 MappingProxyType 或列表下标更快
+    field_config = extract_field_config
+    
+    for _, field_id, field_def in sorted_fields:
+        field_name = field_def.get('name', field_id)
+        type_id = field_def.get('type')
+        field_type = type_name(type_id) or get_field_type_name(type_id)
+        description = field_def.get('description', {}).get('text', '').replace('\n', ' ')
         
-        if rule_desc:
-            return f"编号规则: {' + '.join(rule_desc)}", is_ai, ai_desc
-        return "自动编号 (无规则)", is_ai, ai_desc
-
-    # 日期
-    if field_type == 5:
-        date_fmt = prop.get('dateFormat', '')
-        time_fmt = prop.get('timeFormat', '')
-        auto_fill = prop.get('autoFill', False)
+        config, is_ai, ai_desc = field_config(field_def, table_id, table_map, field_map, field_by_id, formula_cache)
         
-        parts = []
-        full_fmt = f"{date_fmt} {time_fmt}".strip()
-        if full_fmt:
-            parts.append(f"格式: {full_fmt}")
-        if auto_fill:
-            parts.append("自动填入创建时间")
-            
-        return " | ".join(parts) if parts else "日期", is_ai, ai_desc
-
-    # 数字
-    if field_type == 2:
-        formatter = prop.get('formatter', '')
-        if formatter:
-            return f"数字格式: {formatter}", is_ai, ai_desc
-        return "数字", is_ai, ai_desc
-
-    # 按钮
-    if field_type == 3001:
-        btn_cfg = prop.get('button', {})
-        trigger_cfg = prop.get('trigger', {})
+        # 处理配置文本，避免破坏表格
+        config_clean = config.replace('\n', ' ').replace('|', '\\|')
+        if len(config_clean) > 500:
+            config_clean = config_clean[:500] + "..."
         
-        title = btn_cfg.get('title', '未命名按钮')
-        # color = btn_cfg.get('color') # 1: blue, etc.
+        ai_marker = "🤖 是" if is_ai else "否"
+        if is_ai and ai_desc:
+            config_clean = f"**AI配置**: {ai_desc}<br><br>{config_clean}"
         
-        trigger_desc = "无触发"
-        if trigger_cfg.get('type') == 0:
-            trigger_desc = "触发自动化/脚本"
-            
-        return f"按钮: [{title}] ({trigger_desc})", is_ai, ai_desc
-
-    # 附件
-    if field_type == 17:
-        return "允许上传附件", is_ai, ai_desc
-    
-    # 其他有配置的字段
-    if prop:
-        # 简化显示，避免过长
-        prop_str = str(prop)
-        if len(prop_str) > 200:
-            prop_str = prop_str[:200] + "..."
-        return prop_str, is_ai, ai_desc
+        w(f"| **{field_name}** | {field_type} | {ai_marker} | {description} | {config_clean} |\n")
     
-    return "-", is_ai, ai_desc
+    w("\n---\n\n")
+    return buf.getvalue()
 
 
-def generate_document(all_tables, table_map, field_map):
+def generate_document(all_tables, table_map, field_map, field_by_id):
     """生成全量字段表 Markdown 文档"""
-    lines = []
-    lines.append("# 全量字段表\n")
-    lines.append(f"> 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    lines.append(f"> 数据表总数: {len(all_tables)}\n\n")
-    
-    # 按表名排序
-    sorted_tables = sorted(all_tables, key=lambda t: table_map.get(t.get('meta', {}).get('id'), ''))
-    
-    for table in sorted_tables:
-        table_id = table.get('meta', {}).get('id')
-        table_name = table_map.get(table_id, table_id)
-        field_map_data = table.get('fieldMap', {})
-        
-        lines.append(f"## 📊 {table_name}\n")
-        lines.append(f"- 表 ID: `{table_id}`\n")
-        lines.append(f"- 字段数量: {len(field_map_data)}\n\n")
-        
-        lines.append("| 字段名称 | 字段类型 | 是否AI字段 | 业务描述 | 完整配置/公式 |\n")
-        lines.append("| :--- | :--- | :--- | :--- | :--- |\n")
-        
-        # 按字段名排序
-        sorted_fields = sorted(field_map_data.items(), key=lambda x: x[1].get('name', ''))
-        
-        for field_id, field_def in sorted_fields:
-            field_name = field_def.get('name', field_id)
-            field_type = get_field_type_name(field_def.get('type'))
-            description = field_def.get('description', {}).get('text', '').replace('\n', ' ')
-            
-            config, is_ai, ai_desc = extract_field_config(field_def, table_id, table_map, field_map)
-            
-            # 处理配置文本，避免破坏表格
-            config_clean = config.replace('\n', ' ').replace('|', '\\|')
-            if len(config_clean) > 500:
-                config_clean = config_clean[:500] + "..."
-            
-            ai_marker = "🤖 是" if is_ai else "否"
-            if is_ai and ai_desc:
-                config_clean = f"**AI配置**: {ai_desc}<br><br>{config_clean}"
-            
-            lines.append(f"| **{field_name}** | {field_type} | {ai_marker} | {description} | {config_clean} |\n")
-        
-        lines.append("\n---\n\n")
+    formula_cache = {}  # 公式翻译缓存只对本次的映射表有效，每个文档新建
+    buf = io.StringIO()
+    w = buf.write
+    w("# 全量字段表\n")
+    w(f"> 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    w(f"> 数据表总数: {len(all_tables)}\n\n")
+    
+    # 按表名排序：键在推导式里一次算好，排序时用 itemgetter 取键，省去逐个调用 lambda
+    keyed_tables = [(table_map.get(t.get('meta', {}).get('id'), ''), t) for t in all_tables]
+    keyed_tables.sort(key=itemgetter(0))
+    sorted_tables = [t for _, t in keyed_tables]
     
-    return "".join(lines)
+    # 各表独立渲染（表多时并行），再按排序顺序拼接
+    for block in render_tables(render_table, sorted_tables, table_map, field_map, field_by_id, formula_cache):
+        w(block)
+    
+    return buf.getvalue()
 
 
 def main():
@@ -511,30 +531,34 @@ def main():
     # 读取 .base 文件
     # 获取 .base 文件路径
     FILE_PATH = find_base_file()
-    print(f"\n[1/4] 读取文件: {FILE_PATH}")
+    print(f"\n[1/3] 读取文件: {FILE_PATH}")
     try:
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 以字节读取后一次性解析，省去文本模式的逐块解码与换行转换
+        with open(FILE_PATH, 'rb') as f:
+            data = json.loads(f.read())
     except Exception as e:
         print(f"❌ 文件读取失败: {e}")
         return
     
-    # 解压快照数据
-    print("[2/4] 解压快照数据...")
-    snapshot = decompress_content(data.get('gzipSnapshot'))
+    # 解压快照并构建名称映射
+    print("[2/3] 解压快照并构建名称映射...")
+    # 只保留快照字段，自动化、仪表盘等其余压缩数据在解压前释放
+    compressed_snapshot = data.get('gzipSnapshot')
+    del data
+    snapshot = decompress_content(compressed_snapshot)
+    del compressed_snapshot
     if not snapshot:
         print("❌ 快照解压失败")
         return
-    
-    # 构建名称映射
-    print("[3/4] 构建名称映射...")
-    table_map, field_map, all_tables = build_name_registry(snapshot)
+    table_map, field_map, field_by_id, all_tables = build_name_registry(snapshot)
+    # 映射表只引用快照中的表结构，记录、视图等其余部分可以释放
+    del snapshot
     print(f"    - 发现 {len(table_map)} 张表")
     print(f"    - 发现 {len(field_map)} 个字段")
     
     # 生成文档
-    print("[4/4] 生成文档...")
-    document = generate_document(all_tables, table_map, field_map)
+    print("[3/3] 生成文档...")
+    document = generate_document(all_tables, table_map, field_map, field_by_id)
     
     # 写入文件
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
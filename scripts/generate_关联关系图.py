@@ -14,90 +14,35 @@
 """
 
 import json
-import base64
-import gzip
-import io
 import datetime
+import io
 import re
+from operator import itemgetter
 
-import glob
-import sys
-import os
+from base_common import find_base_file, decompress_content, build_name_registry, render_tables
 
 # ========== 配置 ==========
 OUTPUT_PATH = "字段关联关系图.md"
 
-def find_base_file():
-    """在当前目录下查找 .base 文件"""
-    base_files = glob.glob("*.base")
-    if not base_files:
-        print("❌ 错误：当前目录下未找到 .base 文件，请先导出并上传您的飞书多维表格 .base 文件到本目录。")
-        sys.exit(1)
-    elif len(base_files) > 1:
-        print(f"❌ 错误：当前目录下找到多个 .base 文件 {base_files}，请仅保留一个需要解析的文件。")
-        sys.exit(1)
-    
-    return base_files[0]
-
-
-def decompress_content(compressed_content):
-    """解压 gzip + base64 编码的内容"""
-    try:
-        if isinstance(compressed_content, str):
-            compressed_bytes = base64.b64decode(compressed_content)
-        else:
-            return None
-        with gzip.GzipFile(fileobj=io.BytesIO(compressed_bytes)) as gz:
-            return json.loads(gz.read().decode('utf-8'))
-    except Exception as e:
-        print(f"解压失败: {e}")
-        return None
+# 公式解析使用的正则（模块加载时预编译一次）
+# 表引用: bitable::$table[tblXXX]
+TABLE_REF_RE = re.compile(r'bitable::\$table\[(.*?)\]')
+# 字段引用: $field[fldXXX] 或 $column[fldXXX]
+FIELD_REF_RE = re.compile(r'\$(?:field|column)\[(.*?)\]')
+# FILTER(...) 内的条件表达式
+FILTER_RE = re.compile(r'\.FILTER\((.*?)\)', re.DOTALL)
+# 等于/不等于条件 (作用于已翻译的公式): CurrentValue.「字段名」= ... 或 != ...
+# 右侧值止于 &、|、,、) 或下一个 CurrentValue.，不会吞掉后续条件
+FILTER_COND_RE = re.compile(r'CurrentValue\.「([^」]+)」\s*(!=|=)\s*((?:(?!CurrentValue\.)[^&|,\)])+)')
 
+# 单个文档内公式翻译缓存 (formula_cache) 的条目上限，由 generate_document 为每次生成新建
+FORMULA_CACHE_MAXSIZE = 4096
 
-def build_name_registry(snapshot):
-    """从快照中构建表名和字段名的映射表"""
-    table_map = {}
-    field_map = {}
-    all_tables = []
-
-    for item in snapshot:
-        if 'schema' not in item:
-            continue
-        
-        schema = item['schema']
-        
-        # 首先从 tableMap 获取表名（这里通常有完整的表名）
-        for tid, tinfo in schema.get('tableMap', {}).items():
-            if isinstance(tinfo, dict) and tinfo.get('name'):
-                table_map[tid] = tinfo['name']
-        
-        # 然后处理 data 中的表结构
-        if 'data' not in schema:
-            continue
-            
-        data = schema['data']
-        tables = data.get('tables', [])
-        if 'table' in data:
-            tables.append(data['table'])
-        
-        for table in tables:
-            if not isinstance(table, dict):
-                continue
-            
-            all_tables.append(table)
-            table_id = table.get('meta', {}).get('id')
-            table_name = table.get('meta', {}).get('name')
-            
-            # 只有当 tableMap 中没有这个表时才使用 meta.name
-            if table_id and table_id not in table_map:
-                table_map[table_id] = table_name or table_id
-                
-            if table_id:
-                for field_id, field_def in table.get('fieldMap', {}).items():
-                    field_name = field_def.get('name') or field_id
-                    field_map[(table_id, field_id)] = field_name
-
-    return table_map, field_map, all_tables
+# 每张关联字段表的表头与对齐行，固定文本，整段一次写入
+RELATION_TABLE_HEADER = (
+    "| 字段名称 | 关联类型 | 目标表 | 目标字段 | 逻辑说明 |\n"
+    "| :--- | :--- | :--- | :--- | :--- |\n"
+)
 
 
 def get_table_name(table_id, table_map):
@@ -111,7 +56,7 @@ def get_table_name(table_id, table_map):
     return f"[已删除的表:{table_id}]"
 
 
-def get_field_name(table_id, field_id, field_map):
+def get_field_name(table_id, field_id, field_map, field_by_id):
     """获取字段名，如果找不到则返回友好标记"""
     if not field_id:
         return "未知字段"
@@ -122,36 +67,45 @@ def get_field_name(table_id, field_id, field_map):
         return name
     
     # 再尝试只用字段ID匹配（跨表引用场景）
-    for (tid, fid), fname in field_map.items():
-        if fid == field_id:
-            return fname
+    name = field_by_id.get(field_id)
+    if name:
+        return name
     
     # 找不到时返回友好标记但包含ID
     return f"[已删除的字段:{field_id}]"
 
 
-def translate_formula(formula, current_table_id, table_map, field_map):
-    """将公式中的 ID 翻译为可读格式"""
+def translate_formula(formula, current_table_id, table_map, field_map, field_by_id, formula_cache=None):
+    """将公式中的 ID 翻译为可读格式（传入 formula_cache 时按公式和当前表缓存，缓存只对同一组映射表有效）"""
     if not formula:
         return ""
     
+    cache_key = (formula, current_table_id)
+    if formula_cache is not None:
+        cached = formula_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
     # 替换表引用
     def replace_table(match):
         tid = match.group(1)
         return f"「{get_table_name(tid, table_map)}」"
     
-    formula = re.sub(r'bitable::\$table\[(.*?)\]', replace_table, formula)
+    if 'bitable::$table[' in formula:
+        formula = TABLE_REF_RE.sub(replace_table, formula)
     
     # 替换字段引用
     def replace_field(match):
         fid = match.group(1)
-        return f"「{get_field_name(current_table_id, fid, field_map)}」"
+        return f"「{get_field_name(current_table_id, fid, field_map, field_by_id)}」"
     
-    formula = re.sub(r'\$(?:field|column)\[(.*?)\]', replace_field, formula)
+    formula = FIELD_REF_RE.sub(replace_field, formula)
     
     # 清理前缀
     formula = formula.replace("bitable::", "")
     
+    if formula_cache is not None and len(formula_cache) < FORMULA_CACHE_MAXSIZE:
+        formula_cache[cache_key] = formula
     return formula
 
 
@@ -160,11 +114,12 @@ def find_cross_table_references(formula, current_table_id):
     检查公式中是否引用了其他表。
     返回引用的表ID列表。
     """
-    if not formula:
+    # 大多数公式只引用本表，先做子串判断，省去正则扫描
+    if not formula or 'bitable::$table[' not in formula:
         return []
     
     # 提取所有表引用
-    table_refs = re.findall(r'bitable::\$table\[(.*?)\]', formula)
+    table_refs = TABLE_REF_RE.findall(formula)
     
     # 过滤出外部表引用
     external_refs = [tid for tid in table_refs if tid != current_table_id]
@@ -172,39 +127,160 @@ def find_cross_table_references(formula, current_table_id):
     return list(set(external_refs))
 
 
-def extract_filter_conditions(formula, current_table_id, table_map, field_map):
+def extract_filter_conditions(formula, current_table_id, table_map, field_map, field_by_id, formula_cache):
     """
     从公式中提取 FILTER 条件，返回可读的条件描述。
     例如: FILTER(CurrentValue.「字段A」=「表B」.「字段C」) -> 「字段A」 等于 「表B」.「字段C」
+    以 OR(…, …) / || 连接的多个条件分别识别:
+
+    >>> names = {('tblX', 'fldA'): 'A', ('tblX', 'fldB'): 'B'}
+    >>> extract_filter_conditions(
+    ...     '.FILTER(OR(CurrentValue.$column[fldA]=1, CurrentValue.$column[fldB]!=2))',
+    ...     'tblX', {}, names, {}, None)
+    '筛选条件: 「A」= 1 且 「B」≠ 2'
+    >>> extract_filter_conditions(
+    ...     '.FILTER(CurrentValue.$column[fldB]!=2 || CurrentValue.$column[fldA]=1)',
+    ...     'tblX', {}, names, {}, None)
+    '筛选条件: 「A」= 1 且 「B」≠ 2'
     """
     if not formula:
         return ""
     
     # 先翻译整个公式（将所有 ID 转为可读名称）
-    translated_formula = translate_formula(formula, current_table_id, table_map, field_map)
+    translated_formula = translate_formula(formula, current_table_id, table_map, field_map, field_by_id, formula_cache)
     
     # 查找 FILTER 中的条件
     conditions = []
     
     # 提取 FILTER 内的条件表达式（从已翻译的公式提取）
-    filter_matches = re.findall(r'\.FILTER\((.*?)\)', translated_formula, re.DOTALL)
+    filter_matches = FILTER_RE.findall(translated_formula)
     for filter_expr in filter_matches:
-        # 查找等于条件: CurrentValue.「字段名」=...
-        eq_matches = re.findall(r'CurrentValue\.「([^」]+)」\s*=\s*([^&\)]+)', filter_expr)
-        for left_fname, right_expr in eq_matches:
-            conditions.append(f"「{left_fname}」= {right_expr.strip()}")
-        
-        # 查找不等于条件: CurrentValue.「字段名」!="xxx"
-        neq_matches = re.findall(r'CurrentValue\.「([^」]+)」\s*!=\s*([^&\)]+)', filter_expr)
-        for left_fname, right_expr in neq_matches:
-            conditions.append(f"「{left_fname}」≠ {right_expr.strip()}")
+        # 一次扫描取出等于和不等于条件（右侧值有界，相邻条件不会被吞掉）；按先等于、后不等于输出
+        eq_conditions = []
+        neq_conditions = []
+        for left_fname, op, right_expr in FILTER_COND_RE.findall(filter_expr):
+            if op == "!=":
+                neq_conditions.append(f"「{left_fname}」≠ {right_expr.strip()}")
+            else:
+                eq_conditions.append(f"「{left_fname}」= {right_expr.strip()}")
+        conditions.extend(eq_conditions)
+        conditions.extend(neq_conditions)
     
     if conditions:
         return "筛选条件: " + " 且 ".join(conditions)
     return ""
 
 
-def extract_relationships(table, table_id, table_map, field_map):
+def formula_relationship(field_name, field_type, prop, table_id, table_map, field_map, field_by_id, formula_cache):
+    """公式关联 (type=20): 公式中引用了外部表时返回关联记录"""
+    formula = prop.get('formula', '')
+    external_refs = find_cross_table_references(formula, table_id)
+    if not external_refs:
+        return None
+    
+    # 有外部表引用
+    target_tables = [get_table_name(tid, table_map) for tid in external_refs]
+    translated_formula = translate_formula(formula, table_id, table_map, field_map, field_by_id, formula_cache)
+    filter_conds = extract_filter_conditions(formula, table_id, table_map, field_map, field_by_id, formula_cache)
+    
+    logic = "通过公式计算引用外部表数据"
+    if filter_conds:
+        logic += f"<br>{filter_conds}"
+    
+    return {
+        'field_name': field_name,
+        'relation_type': '公式关联',
+        'target_table': ', '.join(target_tables),
+        'target_field': '-',
+        'logic': logic,
+        'formula': translated_formula
+    }
+
+
+def lookup_relationship(field_name, field_type, prop, table_id, table_map, field_map, field_by_id, formula_cache):
+    """查找引用 (type=19)"""
+    filter_info = prop.get('filterInfo', {})
+    target_tid = filter_info.get('targetTable')
+    target_fid = prop.get('targetField')
+    if not target_tid:
+        return None
+    
+    target_tname = get_table_name(target_tid, table_map)
+    target_fname = get_field_name(target_tid, target_fid, field_map, field_by_id)
+    
+    # 提取完整的查找公式
+    lookup_formula = prop.get('formula', '')
+    translated = translate_formula(lookup_formula, table_id, table_map, field_map, field_by_id, formula_cache) if lookup_formula else ''
+    filter_conds = extract_filter_conditions(lookup_formula, table_id, table_map, field_map, field_by_id, formula_cache) if lookup_formula else ''
+    
+    logic = f"从「{target_tname}」的「{target_fname}」字段获取数据"
+    if filter_conds:
+        logic += f"<br>{filter_conds}"
+    
+    return {
+        'field_name': field_name,
+        'relation_type': '查找引用',
+        'target_table': target_tname,
+        'target_field': target_fname,
+        'logic': logic,
+        'formula': translated
+    }
+
+
+def link_relationship(field_name, field_type, prop, table_id, table_map, field_map, field_by_id, formula_cache):
+    """关联/双向关联 (type=18, 21)"""
+    target_tid = prop.get('tableId')
+    if not target_tid:
+        return None
+    
+    target_tname = get_table_name(target_tid, table_map)
+    relation_type = '双向关联' if field_type == 21 else '单向关联'
+    
+    return {
+        'field_name': field_name,
+        'relation_type': relation_type,
+        'target_table': target_tname,
+        'target_field': '-',
+        'logic': f"与「{target_tname}」建立记录关联",
+        'formula': ''
+    }
+
+
+def option_sync_relationship(field_name, field_type, prop, table_id, table_map, field_map, field_by_id, formula_cache):
+    """选项同步 (单选/多选 type=3, 4 且有 optionsRule)"""
+    options_rule = prop.get('optionsRule')
+    if not options_rule:
+        return None
+    target_tid = options_rule.get('targetTable')
+    target_fid = options_rule.get('targetField')
+    if not target_tid:
+        return None
+    
+    target_tname = get_table_name(target_tid, table_map)
+    target_fname = get_field_name(target_tid, target_fid, field_map, field_by_id)
+    
+    return {
+        'field_name': field_name,
+        'relation_type': '选项同步',
+        'target_table': target_tname,
+        'target_field': target_fname,
+        'logic': f"下拉选项实时同步自「{target_tname}」的「{target_fname}」",
+        'formula': ''
+    }
+
+
+# 字段类型 -> 关联提取函数；函数返回 None 表示该字段没有跨表关联
+RELATIONSHIP_HANDLERS = {
+    20: formula_relationship,
+    19: lookup_relationship,
+    18: link_relationship,
+    21: link_relationship,
+    3: option_sync_relationship,
+    4: option_sync_relationship,
+}
+
+
+def extract_relationships(table, table_id, table_map, field_map, field_by_id, formula_cache):
     """
     提取单个表中所有与外部表有关联的字段。
     返回关联字段列表，每个元素为字典：
@@ -220,159 +296,99 @@ def extract_relationships(table, table_id, table_map, field_map):
     """
     relationships = []
     field_map_data = table.get('fieldMap', {})
+    # 逐字段循环是纯 Python 的热点：分派表绑定为局部变量，省去每个字段的全局查找
+    handler_for_type = RELATIONSHIP_HANDLERS.get
     
     for field_id, field_def in field_map_data.items():
-        field_name = field_def.get('name', field_id)
+        # 不可能产生关联的字段类型直接跳过，不再读取名称和配置
         field_type = field_def.get('type')
-        prop = field_def.get('property', {})
-        
-        # 1. 公式关联 (type=20)
-        if field_type == 20:
-            formula = prop.get('formula', '')
-            external_refs = find_cross_table_references(formula, table_id)
-            
-            if external_refs:
-                # 有外部表引用
-                target_tables = [get_table_name(tid, table_map) for tid in external_refs]
-                translated_formula = translate_formula(formula, table_id, table_map, field_map)
-                filter_conds = extract_filter_conditions(formula, table_id, table_map, field_map)
-                
-                logic = "通过公式计算引用外部表数据"
-                if filter_conds:
-                    logic += f"<br>{filter_conds}"
-                
-                relationships.append({
-                    'field_name': field_name,
-                    'relation_type': '公式关联',
-                    'target_table': ', '.join(target_tables),
-                    'target_field': '-',
-                    'logic': logic,
-                    'formula': translated_formula
-                })
-        
-        # 2. 查找引用 (type=19)
-        elif field_type == 19:
-            filter_info = prop.get('filterInfo', {})
-            target_tid = filter_info.get('targetTable')
-            target_fid = prop.get('targetField')
-            
-            if target_tid:
-                target_tname = get_table_name(target_tid, table_map)
-                target_fname = get_field_name(target_tid, target_fid, field_map)
-                
-                # 提取完整的查找公式
-                lookup_formula = prop.get('formula', '')
-                translated = translate_formula(lookup_formula, table_id, table_map, field_map) if lookup_formula else ''
-                filter_conds = extract_filter_conditions(lookup_formula, table_id, table_map, field_map) if lookup_formula else ''
-                
-                logic = f"从「{target_tname}」的「{target_fname}」字段获取数据"
-                if filter_conds:
-                    logic += f"<br>{filter_conds}"
-                
-                relationships.append({
-                    'field_name': field_name,
-                    'relation_type': '查找引用',
-                    'target_table': target_tname,
-                    'target_field': target_fname,
-                    'logic': logic,
-                    'formula': translated
-                })
-        
-        # 3. 关联/双向关联 (type=18, 21)
-        elif field_type in [18, 21]:
-            target_tid = prop.get('tableId')
-            if target_tid:
-                target_tname = get_table_name(target_tid, table_map)
-                relation_type = '双向关联' if field_type == 21 else '单向关联'
-                
-                relationships.append({
-                    'field_name': field_name,
-                    'relation_type': relation_type,
-                    'target_table': target_tname,
-                    'target_field': '-',
-                    'logic': f"与「{target_tname}」建立记录关联",
-                    'formula': ''
-                })
+        handler = handler_for_type(field_type)
+        if not handler:
+            continue
         
-        # 4. 选项同步 (单选/多选 type=3, 4 且有 optionsRule)
-        elif field_type in [3, 4]:
-            options_rule = prop.get('optionsRule', {})
-            target_tid = options_rule.get('targetTable')
-            target_fid = options_rule.get('targetField')
-            
-            if target_tid:
-                target_tname = get_table_name(target_tid, table_map)
-                target_fname = get_field_name(target_tid, target_fid, field_map)
-                
-                relationships.append({
-                    'field_name': field_name,
-                    'relation_type': '选项同步',
-                    'target_table': target_tname,
-                    'target_field': target_fname,
-                    'logic': f"下拉选项实时同步自「{target_tname}」的「{target_fname}」",
-                    'formula': ''
-                })
+        field_name = field_def.get('name', field_id)
+        relationship = handler(field_name, field_type, field_def.get('property', {}), table_id, table_map, field_map, field_by_id, formula_cache)
+        if relationship:
+            relationships.append(relationship)
     
     return relationships
 
 
-def generate_document(all_tables, table_map, field_map):
+def render_table(table, table_map, field_map, field_by_id, formula_cache):
+    """
+    渲染单张表的关联字段表格，只依赖该表和名称映射，可在子进程中执行。
+    返回: (markdown, 关联字段数)；没有跨表关联时返回 ("", 0)
+    """
+    table_id = table.get('meta', {}).get('id')
+    table_name = table_map.get(table_id, table_id)
+    
+    relationships = extract_relationships(table, table_id, table_map, field_map, field_by_id, formula_cache)
+    
+    if not relationships:
+        return "", 0
+    
+    buf = io.StringIO()
+    w = buf.write
+    w(f"## 📊 {table_name}\n")
+    w(f"- 表 ID: `{table_id}`\n")
+    w(f"- 对外关联字段数: {len(relationships)}\n\n")
+    
+    w(RELATION_TABLE_HEADER)
+    
+    for rel in sorted(relationships, key=itemgetter('field_name')):
+        logic = rel['logic']
+        if rel['formula']:
+            # 添加可展开的公式详情
+            formula_clean = rel['formula'].replace('\n', ' ').replace('|', '\\|')
+            if len(formula_clean) > 100:
+                logic += f"<br><details><summary>查看完整公式</summary>`{formula_clean}`</details>"
+            else:
+                logic += f"<br>公式: `{formula_clean}`"
+        
+        w(f"| **{rel['field_name']}** | {rel['relation_type']} | {rel['target_table']} | {rel['target_field']} | {logic} |\n")
+    
+    w("\n---\n\n")
+    return buf.getvalue(), len(relationships)
+
+
+def generate_document(all_tables, table_map, field_map, field_by_id):
     """生成关联关系图 Markdown 文档"""
-    lines = []
-    lines.append("# 关联关系图\n")
-    lines.append(f"> 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    lines.append(f"> 数据表总数: {len(all_tables)}\n\n")
+    formula_cache = {}  # 公式翻译缓存只对本次的映射表有效，每个文档新建
+    # 统计摘要位于引言首行之后，但要遍历完才知道，所以头部和正文分开写
+    head = io.StringIO()
+    body = io.StringIO()
+    w = body.write
+    head.write("# 关联关系图\n")
+    head.write(f"> 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    head.write(f"> 数据表总数: {len(all_tables)}\n\n")
     
-    lines.append("本文档列出了系统中所有具有 **跨表关联** 的字段，包括：\n")
-    lines.append("- **公式关联**: 通过公式引用其他表的数据进行计算\n")
-    lines.append("- **查找引用**: 从关联记录中获取特定字段的值\n")
-    lines.append("- **选项同步**: 下拉选项从其他表字段动态获取\n")
-    lines.append("- **记录关联**: 与其他表建立记录级别的关联\n\n")
+    head.write("本文档列出了系统中所有具有 **跨表关联** 的字段，包括：\n")
+    w("- **公式关联**: 通过公式引用其他表的数据进行计算\n")
+    w("- **查找引用**: 从关联记录中获取特定字段的值\n")
+    w("- **选项同步**: 下拉选项从其他表字段动态获取\n")
+    w("- **记录关联**: 与其他表建立记录级别的关联\n\n")
     
     total_relationships = 0
     tables_with_relations = 0
     
-    # 按表名排序
-    sorted_tables = sorted(all_tables, key=lambda t: table_map.get(t.get('meta', {}).get('id'), ''))
+    # 按表名排序（先算好键，再用 itemgetter 排序）
+    keyed_tables = [(table_map.get(t.get('meta', {}).get('id'), ''), t) for t in all_tables]
+    keyed_tables.sort(key=itemgetter(0))
+    sorted_tables = [t for _, t in keyed_tables]
     
-    for table in sorted_tables:
-        table_id = table.get('meta', {}).get('id')
-        table_name = table_map.get(table_id, table_id)
-        
-        relationships = extract_relationships(table, table_id, table_map, field_map)
-        
-        if not relationships:
+    # 各表独立渲染（表多时并行），再按排序顺序拼接
+    for block, relation_count in render_tables(render_table, sorted_tables, table_map, field_map, field_by_id, formula_cache):
+        if not relation_count:
             continue
-        
         tables_with_relations += 1
-        total_relationships += len(relationships)
-        
-        lines.append(f"## 📊 {table_name}\n")
-        lines.append(f"- 表 ID: `{table_id}`\n")
-        lines.append(f"- 对外关联字段数: {len(relationships)}\n\n")
-        
-        lines.append("| 字段名称 | 关联类型 | 目标表 | 目标字段 | 逻辑说明 |\n")
-        lines.append("| :--- | :--- | :--- | :--- | :--- |\n")
-        
-        for rel in sorted(relationships, key=lambda x: x['field_name']):
-            logic = rel['logic']
-            if rel['formula']:
-                # 添加可展开的公式详情
-                formula_clean = rel['formula'].replace('\n', ' ').replace('|', '\\|')
-                if len(formula_clean) > 100:
-                    logic += f"<br><details><summary>查看完整公式</summary>`{formula_clean}`</details>"
-                else:
-                    logic += f"<br>公式: `{formula_clean}`"
-            
-            lines.append(f"| **{rel['field_name']}** | {rel['relation_type']} | {rel['target_table']} | {rel['target_field']} | {logic} |\n")
-        
-        lines.append("\n---\n\n")
+        total_relationships += relation_count
+        w(block)
     
     # 添加统计摘要到开头
     summary = f"**统计摘要**: 共 {tables_with_relations} 张表存在跨表关联，涉及 {total_relationships} 个关联字段。\n\n"
-    lines.insert(4, summary)
-    
-    return "".join(lines)
+    head.write(summary)
+    head.write(body.getvalue())
+    return head.getvalue()
 
 
 def main():
@@ -382,30 +398,34 @@ def main():
     
     # 读取文件
     FILE_PATH = find_base_file()
-    print(f"\n[1/4] 读取文件: {FILE_PATH}")
+    print(f"\n[1/3] 读取文件: {FILE_PATH}")
     try:
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 以字节读取后一次性解析，省去文本模式的逐块解码与换行转换
+        with open(FILE_PATH, 'rb') as f:
+            data = json.loads(f.read())
     except Exception as e:
         print(f"❌ 文件读取失败: {e}")
         return
     
-    # 解压快照
-    print("[2/4] 解压快照数据...")
-    snapshot = decompress_content(data.get('gzipSnapshot'))
+    # 解压快照并构建名称映射
+    print("[2/3] 解压快照并构建名称映射...")
+    # 只保留快照字段，自动化、仪表盘等其余压缩数据在解压前释放
+    compressed_snapshot = data.get('gzipSnapshot')
+    del data
+    snapshot = decompress_content(compressed_snapshot)
+    del compressed_snapshot
     if not snapshot:
         print("❌ 快照解压失败")
         return
-    
-    # 构建名称映射
-    print("[3/4] 构建名称映射...")
-    table_map, field_map, all_tables = build_name_registry(snapshot)
+    table_map, field_map, field_by_id, all_tables = build_name_registry(snapshot)
+    # 映射表只引用快照中的表结构，记录、视图等其余部分可以释放
+    del snapshot
     print(f"    - 发现 {len(table_map)} 张表")
     print(f"    - 发现 {len(field_map)} 个字段")
     
     # 生成文档
-    print("[4/4] 生成文档...")
-    document = generate_document(all_tables, table_map, field_map)
+    print("[3/3] 生成文档...")
+    document = generate_document(all_tables, table_map, field_map, field_by_id)
     
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
         f.write(document)
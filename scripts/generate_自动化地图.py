@@ -15,11 +15,12 @@
 """
 
 import json
-import base64
+import binascii
 import gzip
-import io
 import datetime
+import time
 import re
+from collections import namedtuple
 
 import glob
 import sys
@@ -104,6 +105,87 @@ TRIGGER_TYPES = {
     "ChangeRecordNewSatisfyTrigger": "新增/修改的记录满足条件时触发"
 }
 
+# 无标题工作流按触发器类型生成的描述性标题，{table} 为触发表名
+WORKFLOW_TITLE_TEMPLATES = {
+    "ChangeRecordTrigger": "当「{table}」记录变更时",
+    "AddRecordTrigger": "当「{table}」新增记录时",
+    "SetRecordTrigger": "当「{table}」记录满足条件时",
+    "TimerTrigger": "定时触发 (基于「{table}」)",
+    "ButtonTrigger": "按钮触发 (「{table}」)"
+}
+
+# 触发来源翻译 (triggerControlList)
+TRIGGER_SOURCES = {
+    'pasteUpdate': '粘贴更新',
+    'automationBatchUpdate': '自动化批量更新',
+    'appendImport': '追加导入',
+    'openAPIBatchUpdate': 'API批量更新'
+}
+
+# 定时触发重复规则翻译
+TIMER_RULES = {'MONTHLY': '每月', 'WEEKLY': '每周', 'DAILY': '每天', 'HOURLY': '每小时'}
+
+# 按钮类型翻译
+BUTTON_TYPES = {'buttonField': '字段按钮触发', 'recordMenu': '记录菜单触发'}
+
+# 循环类型翻译
+LOOP_TYPES = {'forEach': '遍历每条记录', 'times': '固定次数'}
+
+# 引用值中的记录属性翻译
+RECORD_ATTRIBUTES = {'recordId': '记录ID', 'record': '记录'}
+
+# 条件左值引用步骤结果时的属性翻译 (recordNum 等)
+STEP_RESULT_ATTRIBUTES = {
+    'recordNum': '记录数',
+    'recordId': '记录ID',
+    'record': '记录',
+    'value': '值'
+}
+
+# 条件左值引用的步骤类型翻译
+STEP_RESULT_TYPES = {
+    'FindRecordAction': '查找记录',
+    'AddRecordAction': '新增记录'
+}
+
+# 已知步骤类型与属性组合的完整描述模板 (步骤类型, 属性) -> "[步骤{}(类型)的属性]"，
+# 常见情况一次查表即可，未知组合再逐项翻译
+STEP_RESULT_TEMPLATES = {
+    (step_type, attribute): f"[步骤{{}}({type_name})的{attr_name}]"
+    for step_type, type_name in STEP_RESULT_TYPES.items()
+    for attribute, attr_name in STEP_RESULT_ATTRIBUTES.items()
+}
+
+# 系统变量翻译
+SYSTEM_VARIABLES = {'viewUrl': '视图链接', 'recordUrl': '记录链接'}
+
+# 引用类型 (tagType) 的友好描述
+REF_TAG_NAMES = {
+    'loop': '循环当前记录',
+    'step': '结果',
+    'trigger': '触发记录',
+    'RecordAttribute': '记录属性'
+}
+
+# 快照中的名称映射，作为一个整体在 main → generate_document → parse_workflow 之间传递
+# (namedtuple 没有实例 __dict__，解包顺序与原先的四元组返回值一致)
+NameRegistry = namedtuple('NameRegistry', 'table_map field_map field_by_id option_map')
+
+# 工作流 TableMap 展开后的索引，由 parse_workflow 为每个工作流构建一次 (见 index_workflow_tables)，
+# 作为 wf_index 逐层传给各解析函数；table_names / field_names_cache 为本工作流内的解析结果缓存
+WorkflowIndex = namedtuple('WorkflowIndex', 'table_ids field_names table_names field_names_cache')
+
+# 步骤描述函数 (describe_*) 的输出上下文，由 parse_step 为每个步骤构造一次:
+# emit 逐行输出，item_prefix / detail_indent 为条目与明细的缩进，
+# wf_index 为本工作流的 WorkflowIndex，step_id_map 为步骤 ID -> 序号
+StepContext = namedtuple('StepContext', 'emit item_prefix detail_indent wf_index step_id_map')
+
+# 字段引用 ref_tblXXX_fldYYY / ref_ref_tblXXX_fldYYY 中的表 ID 与字段 ID（模块加载时预编译一次）
+REF_FIELD_RE = re.compile(r'(tbl[^_]+)_(fld.+)')
+
+# 预生成的各层缩进（每层两个空格），超出范围时再临时计算
+INDENTS = tuple("  " * i for i in range(64))
+
 
 def decompress_content(compressed_content):
     """解压 gzip 压缩的数据 (支持 int列表 或 Base64字符串)"""
@@ -114,8 +196,10 @@ def decompress_content(compressed_content):
     if isinstance(compressed_content, list):
         try:
             compressed_bytes = bytes(compressed_content)
-            with gzip.GzipFile(fileobj=io.BytesIO(compressed_bytes)) as gz:
-                return json.loads(gz.read().decode('utf-8'))
+            # gzip.decompress 依次解压全部 gzip 成员，与其他脚本保持一致
+            raw = gzip.decompress(compressed_bytes)
+            del compressed_bytes  # 解析 JSON 前先释放压缩数据，降低峰值内存
+            return json.loads(raw)
         except Exception as e:
             # print(f"List解压失败: {e}")
             pass
@@ -123,10 +207,11 @@ def decompress_content(compressed_content):
     # 情况2: Base64 String
     if isinstance(compressed_content, str):
         try:
-            import base64
-            decoded = base64.b64decode(compressed_content)
-            with gzip.GzipFile(fileobj=io.BytesIO(decoded)) as gz:
-                return json.loads(gz.read().decode('utf-8'))
+            # 直接解码字符串，少一次 str→bytes 复制
+            decoded = binascii.a2b_base64(compressed_content)
+            raw = gzip.decompress(decoded)
+            del decoded
+            return json.loads(raw)
         except Exception as e:
             # print(f"Base64解压失败: {e}")
             pass
@@ -156,7 +241,8 @@ def build_name_registry(snapshot):
             continue
             
         data = schema['data']
-        tables = data.get('tables', [])
+        # 复制一份再追加 data.table，不修改快照中的 tables 列表
+        tables = list(data.get('tables', []))
         if 'table' in data:
             tables.append(data['table'])
         
@@ -164,8 +250,9 @@ def build_name_registry(snapshot):
             if not isinstance(table, dict):
                 continue
             
-            table_id = table.get('meta', {}).get('id')
-            table_name = table.get('meta', {}).get('name')
+            meta = table.get('meta')
+            table_id = meta.get('id') if meta else None
+            table_name = meta.get('name') if meta else None
             
             # 只有当 tableMap 中没有这个表时才使用 meta.name
             if table_id and table_id not in table_map:
@@ -177,30 +264,49 @@ def build_name_registry(snapshot):
                     field_map[(table_id, field_id)] = field_name
                     
                     # 提取选项 - 使用简单的 opt_id 作为键（选项ID全局唯一）
-                    for opt in field_def.get('property', {}).get('options', []):
+                    # 只登记有名称的选项，这样查到即可直接使用，无名称的选项保持显示原 ID
+                    prop = field_def.get('property')
+                    for opt in (prop.get('options') if prop else None) or ():
                         opt_id = opt.get('id')
                         opt_name = opt.get('name')
-                        if opt_id:
+                        if opt_id and opt_name:
                             option_map[opt_id] = opt_name
                             
-    return table_map, field_map, option_map
+    # 字段 ID 反向索引: field_id -> field_name（同一 ID 取最先出现的表），兜底查找时不再线性扫描 field_map
+    field_by_id = {}
+    for (tid, fid), name in field_map.items():
+        field_by_id.setdefault(fid, name)
+    
+    return NameRegistry(table_map, field_map, field_by_id, option_map)
 
 
-def resolve_table_id(ref_id, wf_table_map, global_table_map):
+def resolve_table_id(ref_id, wf_index, global_table_map):
     """
     解析工作流中的表引用ID到实际表名。
     工作流中常用 ref_tblXXX 格式，需要通过 Extra.TableMap 映射到实际 ID。
+    同一工作流内结果按引用 ID 缓存。
     """
+    if not wf_index or not isinstance(ref_id, str):
+        return lookup_table_name(ref_id, wf_index, global_table_map)
+    cache = wf_index.table_names
+    name = cache.get(ref_id)
+    if name is None:
+        name = cache[ref_id] = lookup_table_name(ref_id, wf_index, global_table_map)
+    return name
+
+
+def lookup_table_name(ref_id, wf_index, global_table_map):
+    """resolve_table_id 的实际查找逻辑（不带缓存）"""
     if not ref_id:
         return "未知表"
     
-    # 去除可能的引号
-    if isinstance(ref_id, str):
+    # 去除可能的引号（绝大多数 ID 不带引号或反斜杠，先判断再 strip）
+    if isinstance(ref_id, str) and ('"' in ref_id or '\\' in ref_id):
         ref_id = ref_id.strip('"').strip('\\"')
     
     # 先检查工作流的映射表
-    if wf_table_map and ref_id in wf_table_map:
-        real_id = wf_table_map[ref_id].get('TableID', '').strip('"')
+    real_id = wf_index.table_ids.get(ref_id) if wf_index else None
+    if real_id is not None:
         if real_id in global_table_map:
             return global_table_map[real_id]
         return real_id if real_id else ref_id
@@ -212,29 +318,61 @@ def resolve_table_id(ref_id, wf_table_map, global_table_map):
     return f"[已删除的表:{ref_id}]"
 
 
-def resolve_field_id(ref_fid, wf_table_map, field_map):
-    """解析工作流中的字段引用ID到实际字段名"""
+def index_workflow_tables(wf_table_map, field_map):
+    """
+    展开工作流的 TableMap，返回 WorkflowIndex:
+    - table_ids: 引用表 ID -> 真实表 ID
+    - field_names: 引用字段 ID -> 字段名，按 TableMap 顺序记录第一个能在 field_map 中解析到的字段名，
+      代替每次查找字段时对 TableMap 的线性扫描
+    - table_names / field_names_cache: 初始为空，由 resolve_table_id / resolve_field_id 按引用 ID 填充
+    """
+    table_ids = {}
+    field_names = {}
+    for ref_tid, info in (wf_table_map or {}).items():
+        if not isinstance(info, dict):
+            continue
+        real_tid = info.get('TableID', '').strip('"')
+        table_ids[ref_tid] = real_tid
+        for ref_fid, real_fid in info.get('FieldMap', {}).items():
+            if ref_fid in field_names:
+                continue
+            fname = field_map.get((real_tid, real_fid))
+            if fname:
+                field_names[ref_fid] = fname
+    return WorkflowIndex(table_ids, field_names, {}, {})
+
+
+def resolve_field_id(ref_fid, wf_index, field_map, field_by_id):
+    """解析工作流中的字段引用ID到实际字段名，同一工作流内结果按引用 ID 缓存"""
+    if not wf_index or not isinstance(ref_fid, str):
+        return lookup_field_name(ref_fid, wf_index, field_map, field_by_id)
+    cache = wf_index.field_names_cache
+    name = cache.get(ref_fid)
+    if name is None:
+        name = cache[ref_fid] = lookup_field_name(ref_fid, wf_index, field_map, field_by_id)
+    return name
+
+
+def lookup_field_name(ref_fid, wf_index, field_map, field_by_id):
+    """resolve_field_id 的实际查找逻辑（不带缓存）"""
     if not ref_fid:
         return "未知字段"
     
-    if isinstance(ref_fid, str):
+    if isinstance(ref_fid, str) and '"' in ref_fid:
         ref_fid = ref_fid.strip('"')
     
     # 处理 ref_ref_tblXXXX_fldYYYY 或 ref_tblXXXX_fldYYYY 格式
     if isinstance(ref_fid, str) and (ref_fid.startswith('ref_ref_tbl') or ref_fid.startswith('ref_tbl')):
-        # 提取 tblXXXXX 和 fldYYYYY
-        import re
-        # 匹配 ref_tbl 或 ref_ref_tbl
-        match = re.search(r'(tbl[^_]+)_(fld.+)', ref_fid)
+        # 提取 tblXXXXX 和 fldYYYYY（匹配 ref_tbl 或 ref_ref_tbl）
+        match = REF_FIELD_RE.search(ref_fid)
         if match:
             real_tid = match.group(1)
             real_fid = match.group(2)
             
-            # 1. 尝试从 wf_table_map 查找真实表ID (如果是 ref_tbl 引用)
+            # 1. 尝试从工作流的表映射查找真实表ID (如果是 ref_tbl 引用)
             # 构造 ref_tblXXX key
-            ref_key = f"ref_{real_tid}"
-            if wf_table_map and ref_key in wf_table_map:
-                mapped_tid = wf_table_map[ref_key].get('TableID', '').strip('"')
+            mapped_tid = wf_index.table_ids.get(f"ref_{real_tid}") if wf_index else None
+            if mapped_tid is not None:
                 fname = field_map.get((mapped_tid, real_fid))
                 if fname:
                     return fname
@@ -244,60 +382,66 @@ def resolve_field_id(ref_fid, wf_table_map, field_map):
             if fname:
                 return fname
             
-            if fname:
-                return fname
-            
             # 3. 忽略表ID，只匹配字段ID (兜底)
-            for (tid, fid), name in field_map.items():
-                if fid == real_fid:
-                    return name
-    
-    # 尝试从映射表中解析 (原有逻辑)
-    for ref_tid, info in (wf_table_map or {}).items():
-        field_mapping = info.get('FieldMap', {})
-        if ref_fid in field_mapping:
-            real_fid = field_mapping[ref_fid]
-            real_tid = info.get('TableID', '').strip('"')
-            fname = field_map.get((real_tid, real_fid))
+            fname = field_by_id.get(real_fid)
             if fname:
                 return fname
     
+    # 尝试从工作流的 FieldMap 映射中解析 (索引由 index_workflow_tables 预先建立)
+    if wf_index:
+        fname = wf_index.field_names.get(ref_fid)
+        if fname:
+            return fname
+    
     # 直接查找
-    for (tid, fid), name in field_map.items():
-        if fid == ref_fid:
-            return name
+    fname = field_by_id.get(ref_fid)
+    if fname:
+        return fname
     
     # 找不到时返回友好标记但包含ID
     return f"[已删除的字段:{ref_fid}]"
 
 
-def parse_condition(condition, wf_table_map, table_map, field_map, option_map):
+def translate_option_values(values, option_map):
+    """把值列表中的选项ID翻译为选项名称（找不到时保留原值），其余值转为字符串"""
+    try:
+        # 每个元素只做一次哈希探测：非选项值（包括数字等非字符串）不在 option_map 中
+        return [option_map[v] if v in option_map else str(v) for v in values]
+    except TypeError:
+        # 值中混有列表/字典等不可哈希对象时逐个判断类型
+        return [option_map[v] if isinstance(v, str) and v in option_map else str(v) for v in values]
+
+
+def parse_condition(condition, wf_index, table_map, field_map, field_by_id, option_map):
     """解析条件对象，返回可读的条件描述"""
     if not isinstance(condition, dict):
         return str(condition)
     
     field_id = condition.get('fieldId', '')
     operator = condition.get('operator', '')
-    value = condition.get('value') or condition.get('matchValue', {}).get('value')
+    value = condition.get('value')
+    if not value:
+        match_value = condition.get('matchValue')
+        value = match_value.get('value') if match_value else None
     
-    field_name = resolve_field_id(field_id, wf_table_map, field_map)
+    field_name = resolve_field_id(field_id, wf_index, field_map, field_by_id)
     op_name = OPERATORS.get(operator, operator)
     
     # 处理值
     if isinstance(value, dict) and value.get('type') == 'ref':
         # 处理引用类型的值 (例如引用步骤结果)
-        value_str = format_value(value, option_map, 0, wf_table_map, field_map)
+        value_str = format_value(value, option_map, 0, wf_index, field_map, field_by_id)
     else:
-        value_str = format_value(value, option_map, 0, wf_table_map, field_map)
+        value_str = format_value(value, option_map, 0, wf_index, field_map, field_by_id)
     
     # 对于 is_empty / is_not_empty 操作符，不需要显示值
-    if operator in ['is_empty', 'is_not_empty']:
+    if operator in {'is_empty', 'is_not_empty'}:
         return f"「{field_name}」{op_name}"
     
     return f"「{field_name}」{op_name} \"{value_str}\""
 
 
-def parse_trigger_filter_condition(condition_obj, wf_table_map, field_map, option_map):
+def parse_trigger_filter_condition(condition_obj, wf_index, field_map, field_by_id, option_map):
     """解析触发器的筛选条件 (step.next[0].condition 结构)"""
     if not condition_obj:
         return ""
@@ -308,11 +452,14 @@ def parse_trigger_filter_condition(condition_obj, wf_table_map, field_map, optio
     if not conditions:
         return ""
     
+    # 循环内反复用到的查表方法先绑定为局部变量
+    operator_name = OPERATORS.get
+    
     parsed_parts = []
     for cond in conditions:
         # 可能是嵌套的条件组
         if 'conditions' in cond:
-            nested = parse_trigger_filter_condition(cond, wf_table_map, field_map, option_map)
+            nested = parse_trigger_filter_condition(cond, wf_index, field_map, field_by_id, option_map)
             if nested:
                 parsed_parts.append(f"({nested})")
         else:
@@ -322,25 +469,20 @@ def parse_trigger_filter_condition(condition_obj, wf_table_map, field_map, optio
             value = cond.get('value', [])
             
             # 解析字段名
-            field_name = resolve_field_id(field_id, wf_table_map, field_map)
+            field_name = resolve_field_id(field_id, wf_index, field_map, field_by_id)
             
             # 翻译操作符
-            op_name = OPERATORS.get(operator, operator)
+            op_name = operator_name(operator, operator)
             
             # 处理值
             if isinstance(value, list):
-                translated_vals = []
-                for v in value:
-                    if isinstance(v, str) and v.startswith('opt'):
-                        translated_vals.append(option_map.get(v, v))
-                    else:
-                        translated_vals.append(str(v))
+                translated_vals = translate_option_values(value, option_map)
                 value_str = ', '.join(translated_vals) if translated_vals else "[空]"
             else:
                 value_str = str(value) if value else "[空]"
             
             # 对于空/非空操作符，不显示值
-            if operator in ['isEmpty', 'isNotEmpty', 'is_empty', 'is_not_empty']:
+            if operator in {'isEmpty', 'isNotEmpty', 'is_empty', 'is_not_empty'}:
                 parsed_parts.append(f"「{field_name}」{op_name}")
             else:
                 parsed_parts.append(f"「{field_name}」{op_name} \"{value_str}\"")
@@ -351,20 +493,20 @@ def parse_trigger_filter_condition(condition_obj, wf_table_map, field_map, optio
 
 
 
-def parse_conditions_list(conditions, wf_table_map, table_map, field_map, option_map, conjunction="and"):
+def parse_conditions_list(conditions, wf_index, table_map, field_map, field_by_id, option_map, conjunction="and"):
     """解析条件列表，返回可读的条件组合描述"""
     if not conditions:
         return "无条件"
     
     parsed = []
     for cond in conditions:
-        parsed.append(parse_condition(cond, wf_table_map, table_map, field_map, option_map))
+        parsed.append(parse_condition(cond, wf_index, table_map, field_map, field_by_id, option_map))
     
     connector = " 且 " if conjunction == "and" else " 或 "
     return connector.join(parsed)
 
 
-def parse_field_values(values, wf_table_map, field_map, option_map):
+def parse_field_values(values, wf_index, field_map, field_by_id, option_map):
     """解析字段值设置列表，并将选项ID翻译为中文名称"""
     if not values:
         return []
@@ -374,62 +516,43 @@ def parse_field_values(values, wf_table_map, field_map, option_map):
         if not isinstance(v, dict):
             continue
         field_id = v.get('fieldId', '')
-        field_name = resolve_field_id(field_id, wf_table_map, field_map)
+        field_name = resolve_field_id(field_id, wf_index, field_map, field_by_id)
         
-        value_type = v.get('valueType', '')
         value = v.get('value', '')
         
-        # 简化值的显示
-        if isinstance(value, list):
-            if len(value) > 0 and isinstance(value[0], dict):
-                # 可能是公式引用
-                if value[0].get('type') == 'ref' and value[0].get('tagType') == 'formula':
-                    value_str = f"[公式计算: {value[0].get('title', '未知')}]"
-                elif value[0].get('type') == 'ref' and value[0].get('tagType') == 'step':
-                    step_num = value[0].get('stepNum', '?')
+        # 简化值的显示：最常见的标量字符串（文本或单个选项ID）最先判断
+        if isinstance(value, str):
+            value_str = option_map.get(value, value) if value else "[空]"
+        elif isinstance(value, list):
+            first = value[0] if value else None
+            if isinstance(first, dict):
+                # 首项是引用时按 tagType 区分公式 / 步骤结果 / 循环记录
+                tag = first.get('tagType') if first.get('type') == 'ref' else None
+                if tag == 'formula':
+                    value_str = f"[公式计算: {first.get('title', '未知')}]"
+                elif tag == 'step' or tag == 'loop':
+                    step_num = first.get('stepNum', '?')
                     # 尝试提取具体引用的字段名
-                    ref_fields = value[0].get('fields', [])
-                    if ref_fields and isinstance(ref_fields, list) and len(ref_fields) > 0:
-                        ref_field_id = ref_fields[0].get('fieldId', '') if isinstance(ref_fields[0], dict) else ''
-                        if ref_field_id:
-                            ref_field_name = resolve_field_id(ref_field_id, wf_table_map, field_map)
+                    ref_fields = first.get('fields', [])
+                    ref_field_id = ''
+                    if ref_fields and isinstance(ref_fields, list) and isinstance(ref_fields[0], dict):
+                        ref_field_id = ref_fields[0].get('fieldId', '')
+                    if ref_field_id:
+                        ref_field_name = resolve_field_id(ref_field_id, wf_index, field_map, field_by_id)
+                        if tag == 'step':
                             value_str = f"[步骤{step_num}的「{ref_field_name}」]"
                         else:
-                            value_str = f"[步骤{step_num}的结果]"
-                    else:
-                        value_str = f"[步骤{step_num}的结果]"
-                elif value[0].get('type') == 'ref' and value[0].get('tagType') == 'loop':
-                    # 循环引用
-                    step_num = value[0].get('stepNum', '?')
-                    ref_fields = value[0].get('fields', [])
-                    if ref_fields and isinstance(ref_fields, list) and len(ref_fields) > 0:
-                        ref_field_id = ref_fields[0].get('fieldId', '') if isinstance(ref_fields[0], dict) else ''
-                        if ref_field_id:
-                            ref_field_name = resolve_field_id(ref_field_id, wf_table_map, field_map)
                             value_str = f"[步骤{step_num}循环的「{ref_field_name}」]"
-                        else:
-                             value_str = f"[步骤{step_num}的循环当前记录]"
+                    elif tag == 'step':
+                        value_str = f"[步骤{step_num}的结果]"
                     else:
                         value_str = f"[步骤{step_num}的循环当前记录]"
                 else:
                     value_str = str(value)
             else:
                 # 可能是选项ID列表
-                translated = []
-                for item in value:
-                    if isinstance(item, str) and item.startswith('opt'):
-                        # 尝试翻译选项ID
-                        opt_name = option_map.get(item)
-                        if opt_name:
-                            translated.append(opt_name)
-                        else:
-                            translated.append(item)
-                    else:
-                        translated.append(str(item))
+                translated = translate_option_values(value, option_map)
                 value_str = ', '.join(translated) if translated else str(value)
-        elif isinstance(value, str) and value.startswith('opt'):
-            # 单个选项ID
-            value_str = option_map.get(value, value)
         elif isinstance(value, dict):
             value_str = str(value)
         else:
@@ -440,126 +563,454 @@ def parse_field_values(values, wf_table_map, field_map, option_map):
     return result
 
 
-def format_value(value, option_map=None, depth=0, wf_table_map=None, field_map=None):
-    """格式化任意值，处理空值、选项翻译和递归结构"""
-    if value == "":
-        return "[空值]"
-    if value is None:
-        return "[空]"
+def format_ref_value(value, wf_index=None, field_map=None, field_by_id=None):
+    """格式化 type=ref 的引用值（步骤结果、循环记录、公式、系统变量等）"""
+    tag = value.get('tagType', '未知')
+    step = value.get('stepNum', '?')
+    fields = value.get('fields', [])
+    
+    # 尝试提取具体引用的字段名
+    field_name_desc = ""
+    if fields and isinstance(fields, list) and len(fields) > 0:
+        field_info = fields[0]
+        if isinstance(field_info, dict):
+            field_id = field_info.get('fieldId', '')
+            if field_id:
+                if field_map:
+                    fn = resolve_field_id(field_id, wf_index, field_map, field_by_id)
+                    field_name_desc = f"的「{fn}」"
+                else:
+                    field_name_desc = f"的[未知字段:{field_id}]"
+
+    # 尝试从 path 中提取字段 (用于 Loop 等场景)
+    if not field_name_desc:
+        path = value.get('path', [])
+        if path and isinstance(path, list):
+            for p in path:
+                if isinstance(p, dict) and p.get('type') == 'Field':
+                    fid = p.get('value', '')
+                    if fid:
+                        if field_map:
+                            fn = resolve_field_id(fid, wf_index, field_map, field_by_id)
+                            field_name_desc = f"的「{fn}」"
+                        else:
+                            field_name_desc = f"的[未知字段:{fid}]"
+                        break
+                elif isinstance(p, dict) and p.get('type') == 'RecordAttr':
+                    attr = p.get('value', '')
+                    field_name_desc = f"的{RECORD_ATTRIBUTES.get(attr, attr)}"
+                    break
+    
+    # 特殊处理 formula
+    if tag == 'formula':
+         return f"[公式计算: {value.get('title', '未知')}]"
+    
+    # 特殊处理 system (系统变量)
+    if tag == 'system':
+        sys_type = value.get('systemType', 'unknown')
+        return f"[系统变量:{SYSTEM_VARIABLES.get(sys_type, sys_type)}]"
+    
+    # 特殊处理 RecordAttribute (记录属性)
+    if tag == 'RecordAttribute':
+        attr = value.get('attribute', 'unknown')
+        return f"[步骤{step}的{RECORD_ATTRIBUTES.get(attr, attr)}]"
+
+    # 根据 tagType 生成更友好的描述
+    tag_desc = REF_TAG_NAMES.get(tag, tag)
     
-    if isinstance(value, str):
-        if value.startswith('opt') and option_map:
-            return option_map.get(value, value)
-        return value
+    if tag == 'loop':
+        if field_name_desc:
+            return f"[步骤{step}循环{field_name_desc}]"
+        return f"[步骤{step}的循环当前记录]"
+    
+    if field_name_desc:
+        return f"[步骤{step}{field_name_desc}]"
         
-    if isinstance(value, list):
-        if not value:
-            return "[空列表]"
+    return f"[步骤{step}的{tag_desc}]"
+
+
+def format_value(value, option_map=None, depth=0, wf_index=None, field_map=None, field_by_id=None):
+    """
+    格式化任意值，处理空值、选项翻译和嵌套结构。
+    嵌套的列表/字典用显式栈做后序遍历：先压入容器本身（待组装），再压入各子值；
+    子值的格式化结果依次进入 results，容器出栈时从末尾取回对应数量的结果组装。
+    """
+    results = []
+    stack = [(value, depth, False)]
+    while stack:
+        node, level, assemble = stack.pop()
         
-        # 预先格式化所有项
-        formatted_items = [format_value(v, option_map, depth+1, wf_table_map, field_map) for v in value]
+        if assemble:
+            count = len(node)
+            formatted_items = results[-count:]
+            del results[-count:]
+            
+            if isinstance(node, list):
+                # 所有项都简短（不包含换行且长度适中）时使用行内显示
+                is_short = True
+                for item in formatted_items:
+                    if '\n' in item or len(item) >= 50:
+                        is_short = False
+                        break
+                if is_short:
+                    results.append(", ".join(formatted_items))
+                else:
+                    # 否则使用列表显示：每项前加同一个换行+缩进前缀，不再为每项拼出中间字符串
+                    bullet = "\n" + (INDENTS[level] if level < len(INDENTS) else "  " * level) + "- "
+                    results.append(bullet + bullet.join(formatted_items))
+            else:
+                # 键、值和分隔符依次放入同一个列表，最后只 join 一次
+                parts = ["{ "]
+                for k, item in zip(node, formatted_items):
+                    parts.append(k)
+                    parts.append(": ")
+                    parts.append(item)
+                    parts.append(", ")
+                parts[-1] = " }"
+                results.append("".join(parts))
+            continue
         
-        # 如果所有项都是简短的（不包含换行且长度适中），则使用行内显示
-        if all('\n' not in item and len(item) < 50 for item in formatted_items):
-            return ", ".join(formatted_items)
+        if node == "":
+            results.append("[空值]")
+        elif node is None:
+            results.append("[空]")
+        elif isinstance(node, str):
+            results.append(option_map.get(node, node) if option_map else node)
+        elif isinstance(node, list):
+            if not node:
+                results.append("[空列表]")
+                continue
+            stack.append((node, level, True))
+            # 逆序压栈，保证子值按原顺序出栈并写入 results
+            for v in reversed(node):
+                stack.append((v, level + 1, False))
+        elif isinstance(node, dict):
+            if not node:
+                results.append("{}")
+            elif node.get('type') == 'ref':
+                # 引用值不含需要继续展开的子结构，直接格式化
+                results.append(format_ref_value(node, wf_index, field_map, field_by_id))
+            else:
+                stack.append((node, level, True))
+                for v in reversed(list(node.values())):
+                    stack.append((v, level + 1, False))
+        else:
+            results.append(str(node))
+    
+    return results[0]
+
+
+def describe_change_record_trigger(step_data, processed_keys, registry, ctx):
+    """ChangeRecordTrigger：字段变化条件和触发来源"""
+    emit, item_prefix, wf_index = ctx.emit, ctx.item_prefix, ctx.wf_index
+    field_map, field_by_id, option_map = registry.field_map, registry.field_by_id, registry.option_map
+    processed_keys.update(('fields', 'triggerControlList'))
+    fields = step_data.get('fields', [])
+    if fields:
+        operator_name = OPERATORS.get
+        option_name = option_map.get
+        cond_parts = []
+        for f in fields:
+            fid = f.get('fieldId', '')
+            fname = resolve_field_id(fid, wf_index, field_map, field_by_id)
+            op = f.get('operator', '')
+            value = f.get('value', [])
+            op_name = operator_name(op, op)  # 使用全局操作符翻译表
+            if op in {'isEmpty', 'isNotEmpty'}:
+                cond_parts.append(f"「{fname}」{op_name}")
+            else:
+                # 翻译选项ID
+                if isinstance(value, list):
+                    val_str = ', '.join(translate_option_values(value, option_map))
+                else:
+                    val_str = option_name(value, value) if isinstance(value, str) else str(value)
+                
+                if val_str == "": val_str = "[空值]"
+                cond_parts.append(f"「{fname}」{op_name} \"{val_str}\"")
+        emit(f"{item_prefix}触发条件: {' 且 '.join(cond_parts)}")
+    
+    trigger_list = step_data.get('triggerControlList', [])
+    if trigger_list:
+        triggers = [TRIGGER_SOURCES.get(t, t) for t in trigger_list]
+        emit(f"{item_prefix}触发来源: {', '.join(triggers)}")
+
+
+def describe_add_record_trigger(step_data, processed_keys, registry, ctx):
+    """AddRecordTrigger：监听字段和触发来源"""
+    emit, item_prefix, wf_index = ctx.emit, ctx.item_prefix, ctx.wf_index
+    field_map, field_by_id = registry.field_map, registry.field_by_id
+    processed_keys.update(('triggerControlList', 'watchedFieldId'))
+    trigger_list = step_data.get('triggerControlList', [])
+    
+    watched_fid = step_data.get('watchedFieldId')
+    
+    if watched_fid:
+        fname = resolve_field_id(watched_fid, wf_index, field_map, field_by_id)
+        emit(f"{item_prefix}监听字段: 「{fname}」")
         
-        # 否则使用列表显示
-        indent = "  " * depth
-        lines = []
-        for item in formatted_items:
-            lines.append(f"\n{indent}- {item}")
-        return "".join(lines)
+    if trigger_list:
+        triggers = [TRIGGER_SOURCES.get(t, t) for t in trigger_list]
+        emit(f"{item_prefix}触发来源: {', '.join(triggers)}")
+
+
+def describe_set_record_trigger(step_data, processed_keys, registry, ctx):
+    """SetRecordTrigger：监听的字段"""
+    emit, item_prefix, wf_index = ctx.emit, ctx.item_prefix, ctx.wf_index
+    field_map, field_by_id = registry.field_map, registry.field_by_id
+    processed_keys.update(('fields', 'fieldIds', 'filterInfo'))  # filterInfo 可能存在
+    fields = step_data.get('fields', [])
+    if fields:
+        field_names = [resolve_field_id(f.get('fieldId', ''), wf_index, field_map, field_by_id) for f in fields]
+        emit(f"{item_prefix}监听字段: {', '.join([f'「{n}」' for n in field_names])}")
+    # 也检查直接的 fieldIds
+    field_ids = step_data.get('fieldIds', [])
+    if field_ids:
+        field_names = [resolve_field_id(fid, wf_index, field_map, field_by_id) for fid in field_ids]
+        emit(f"{item_prefix}监听字段(ID): {', '.join([f'「{n}」' for n in field_names])}")
+
+
+def describe_timer_trigger(step_data, processed_keys, registry, ctx):
+    """TimerTrigger：开始时间和重复规则"""
+    emit, item_prefix = ctx.emit, ctx.item_prefix
+    processed_keys.update(('rule', 'startTime'))
+    rule = step_data.get('rule', '')
+    start_time = step_data.get('startTime')
+    if start_time:
+        try:
+            dt = datetime.datetime.fromtimestamp(start_time / 1000)
+            emit(f"{item_prefix}开始时间: {dt.strftime('%Y-%m-%d %H:%M')}")
+        except:
+            pass
+    emit(f"{item_prefix}重复规则: {TIMER_RULES.get(rule, rule)}")
+
+
+def describe_find_record(step_data, processed_keys, registry, ctx):
+    """查找记录：返回字段、查找条件和无结果时的处理"""
+    emit, item_prefix, wf_index, step_id_map = ctx.emit, ctx.item_prefix, ctx.wf_index, ctx.step_id_map
+    table_map, field_map, field_by_id, option_map = registry
+    # fieldsMap 可能是输出字段映射
+    processed_keys.update(('recordInfo', 'fieldsMap', 'fieldIds', 'recordType', 'shouldProceedWithNoResults'))
+    record_info = step_data.get('recordInfo', {})
+    
+    # 显式处理 fieldIds (返回的字段)
+    field_ids = step_data.get('fieldIds')
+    if field_ids:
+        field_names = [resolve_field_id(fid, wf_index, field_map, field_by_id) for fid in field_ids]
+        emit(f"{item_prefix}返回字段: {', '.join([f'「{n}」' for n in field_names])}")
+    
+    # 记录类型处理
+    record_type = step_data.get('recordType')
+    
+    if record_type == 'Ref' and isinstance(record_info, dict):
+        # 引用之前的步骤
+        ref_step_id = record_info.get('stepId')
+        ref_step_num = step_id_map.get(ref_step_id, '?')
+        emit(f"{item_prefix}查找方式: 基于步骤{ref_step_num}返回的记录进行筛选")
+    elif isinstance(record_info, dict):
+        conditions = record_info.get('conditions', [])
+        if conditions:
+            cond_str = parse_conditions_list(conditions, wf_index, table_map, field_map, field_by_id, option_map)
+            emit(f"{item_prefix}查找条件: {cond_str}")
+        else:
+            emit(f"{item_prefix}查找条件: 无（返回所有记录）")
+    
+    # 是否在无结果时继续
+    should_proceed = step_data.get('shouldProceedWithNoResults', False)
+    if should_proceed:
+        emit(f"{item_prefix}无结果时: 继续执行")
+
+
+def describe_button_trigger(step_data, processed_keys, registry, ctx):
+    """按钮触发：按钮类型"""
+    emit, item_prefix = ctx.emit, ctx.item_prefix
+    processed_keys.add('buttonType')
+    button_type = step_data.get('buttonType')
+    emit(f"{item_prefix}按钮类型: {BUTTON_TYPES.get(button_type, button_type)}")
+
+
+def describe_add_record(step_data, processed_keys, registry, ctx):
+    """新增记录：设置的字段值"""
+    emit, item_prefix, detail_indent, wf_index = ctx.emit, ctx.item_prefix, ctx.detail_indent, ctx.wf_index
+    field_map, field_by_id, option_map = registry.field_map, registry.field_by_id, registry.option_map
+    processed_keys.add('values')
+    values = step_data.get('values', [])
+    if values:
+        field_values = parse_field_values(values, wf_index, field_map, field_by_id, option_map)
+        if field_values:
+            emit(f"{item_prefix}设置字段:")
+            for fv in field_values:
+                emit(f"{detail_indent}{fv}")
+
+
+def describe_update_record(step_data, processed_keys, registry, ctx):
+    """修改记录：修改对象和设置的字段值"""
+    emit, item_prefix, detail_indent, wf_index = ctx.emit, ctx.item_prefix, ctx.detail_indent, ctx.wf_index
+    table_map, field_map, field_by_id, option_map = registry
+    processed_keys.update(('recordType', 'recordInfo', 'maxSetRecordNum', 'values'))  # maxSetRecordNum 可能存在
+    # 记录来源
+    record_type = step_data.get('recordType', '')
+    record_info = step_data.get('recordInfo', {})
+    
+    if record_type == 'stepRecord' or (isinstance(record_info, dict) and record_info.get('type') == 'ref'):
+        # 引用步骤结果
+        step_num = record_info.get('stepNum', '?') if isinstance(record_info, dict) else '?'
+        emit(f"{item_prefix}修改对象: [步骤{step_num}找到的记录]")
+    elif isinstance(record_info, dict) and record_info.get('conditions'):
+        # 有查找条件
+        cond_str = parse_conditions_list(record_info.get('conditions', []), wf_index, table_map, field_map, field_by_id, option_map)
+        emit(f"{item_prefix}修改条件: {cond_str}")
+    
+    # 设置的字段值
+    values = step_data.get('values', [])
+    if values:
+        field_values = parse_field_values(values, wf_index, field_map, field_by_id, option_map)
+        if field_values:
+            emit(f"{item_prefix}设置字段:")
+            for fv in field_values:
+                emit(f"{detail_indent}{fv}")
+
+
+def describe_loop(step_data, processed_keys, registry, ctx):
+    """循环：循环类型、数据来源和循环体入口"""
+    emit, item_prefix, step_id_map = ctx.emit, ctx.item_prefix, ctx.step_id_map
+    processed_keys.update(('loopType', 'loopData', 'maxLoopTimes', 'loopMode', 'startChildStepId'))
+    loop_type = step_data.get('loopType', '')
+    loop_data = step_data.get('loopData', {})
+    max_times = step_data.get('maxLoopTimes', 0)
+    
+    start_child_id = step_data.get('startChildStepId')
+    
+    emit(f"{item_prefix}循环类型: {LOOP_TYPES.get(loop_type, loop_type)}")
+    
+    if isinstance(loop_data, dict) and loop_data.get('type') == 'ref':
+        step_num = loop_data.get('stepNum', '?')
+        emit(f"{item_prefix}循环数据: [步骤{step_num}找到的记录]")
+    
+    if max_times:
+        emit(f"{item_prefix}最大循环次数: {max_times}")
         
-    if isinstance(value, dict):
-        if not value:
-            return "{}"
+    if start_child_id:
+        child_step_num = step_id_map.get(start_child_id, '?')
+        emit(f"{item_prefix}循环体开始: 跳转至步骤 {child_step_num}")
+
+
+def describe_if_else_branch(step_data, processed_keys, registry, ctx):
+    """条件判断：判断条件和两个分支的跳转"""
+    emit, item_prefix, wf_index, step_id_map = ctx.emit, ctx.item_prefix, ctx.wf_index, ctx.step_id_map
+    table_map, field_map, field_by_id, option_map = registry
+    processed_keys.update(('condition', 'meetConditionStepId', 'notMeetConditionStepId'))
+    condition_obj = step_data.get('condition', {})
+    
+    meet_id = step_data.get('meetConditionStepId')
+    
+    not_meet_id = step_data.get('notMeetConditionStepId')
+    
+    if condition_obj:
+        cond_desc = parse_if_else_condition(condition_obj, wf_index, table_map, field_map, field_by_id, option_map)
+        emit(f"{item_prefix}**判断条件**: {cond_desc}")
         
-        # 特殊结构处理
-        if value.get('type') == 'ref':
-            tag = value.get('tagType', '未知')
-            step = value.get('stepNum', '?')
-            fields = value.get('fields', [])
-            
-            # 尝试提取具体引用的字段名
-            field_name_desc = ""
-            if fields and isinstance(fields, list) and len(fields) > 0:
-                field_info = fields[0]
-                if isinstance(field_info, dict):
-                    field_id = field_info.get('fieldId', '')
-                    if field_id:
-                        if field_map:
-                            fn = resolve_field_id(field_id, wf_table_map, field_map)
-                            field_name_desc = f"的「{fn}」"
-                        else:
-                            field_name_desc = f"的[未知字段:{field_id}]"
-
-            # 尝试从 path 中提取字段 (用于 Loop 等场景)
-            if not field_name_desc:
-                path = value.get('path', [])
-                if path and isinstance(path, list):
-                    for p in path:
-                        if isinstance(p, dict) and p.get('type') == 'Field':
-                            fid = p.get('value', '')
-                            if fid:
-                                if field_map:
-                                    fn = resolve_field_id(fid, wf_table_map, field_map)
-                                    field_name_desc = f"的「{fn}」"
-                                else:
-                                    field_name_desc = f"的[未知字段:{fid}]"
-                                break
-                        elif isinstance(p, dict) and p.get('type') == 'RecordAttr':
-                            attr = p.get('value', '')
-                            attr_map = {'recordId': '记录ID', 'record': '记录'}
-                            field_name_desc = f"的{attr_map.get(attr, attr)}"
-                            break
-            
-            # 特殊处理 formula
-            if tag == 'formula':
-                 return f"[公式计算: {value.get('title', '未知')}]"
-            
-            # 特殊处理 system (系统变量)
-            if tag == 'system':
-                sys_type = value.get('systemType', 'unknown')
-                sys_map = {'viewUrl': '视图链接', 'recordUrl': '记录链接'}
-                return f"[系统变量:{sys_map.get(sys_type, sys_type)}]"
-            
-            # 特殊处理 RecordAttribute (记录属性)
-            if tag == 'RecordAttribute':
-                attr = value.get('attribute', 'unknown')
-                attr_map = {'recordId': '记录ID', 'record': '记录'}
-                return f"[步骤{step}的{attr_map.get(attr, attr)}]"
-
-            # 根据 tagType 生成更友好的描述
-            tag_map = {
-                'loop': '循环当前记录',
-                'step': '结果',
-                'trigger': '触发记录',
-                'RecordAttribute': '记录属性'
-            }
-            tag_desc = tag_map.get(tag, tag)
-            
-            if tag == 'loop':
-                if field_name_desc:
-                    return f"[步骤{step}循环{field_name_desc}]"
-                return f"[步骤{step}的循环当前记录]"
-            
-            if field_name_desc:
-                return f"[步骤{step}{field_name_desc}]"
-                
-            return f"[步骤{step}的{tag_desc}]"
-            
-        items = []
-        for k, v in value.items():
-            items.append(f"{k}: {format_value(v, option_map, depth+1, wf_table_map, field_map)}")
-        return "{ " + ", ".join(items) + " }"
+    if meet_id:
+        meet_num = step_id_map.get(meet_id, '?')
+        emit(f"{item_prefix}✅ 满足时: 跳转至步骤 {meet_num}")
+    else:
+        emit(f"{item_prefix}✅ 满足时: 继续执行")
         
-    return str(value)
+    if not_meet_id:
+        not_meet_num = step_id_map.get(not_meet_id, '?')
+        emit(f"{item_prefix}❌ 不满足: 跳转至步骤 {not_meet_num}")
+    else:
+        emit(f"{item_prefix}❌ 不满足: (无动作)")
 
 
-def parse_step(step, wf_table_map, table_map, field_map, option_map, step_id_map, step_index=0, depth=0):
-    """解析单个工作流步骤，返回 Markdown 格式的描述"""
-    indent = "  " * depth
-    lines = []
+def describe_custom_action(step_data, processed_keys, registry, ctx):
+    """自定义动作：packId 和表单配置"""
+    emit, item_prefix, detail_indent, wf_index = ctx.emit, ctx.item_prefix, ctx.detail_indent, ctx.wf_index
+    field_map, field_by_id, option_map = registry.field_map, registry.field_by_id, registry.option_map
+    processed_keys.update(('packId', 'formData', 'version', 'endpointId', 'resultTypeInfo', 'packType'))
+    pack_id = step_data.get('packId', '')
+    form_data = step_data.get('formData', {})
+    
+    emit(f"{item_prefix}动作类型: 自定义动作 (packId: {pack_id})")
+    if form_data:
+        emit(f"{item_prefix}配置详情:")
+        
+        # 尝试通过 key/label 解析配置
+        # 表单数据来自 json 解析，只会是精确的 dict/list/str，直接比较类型即可
+        if type(form_data) is list:
+            for idx, item in enumerate(form_data):
+                if type(item) is dict:
+                    label = item.get('label', item.get('key', f'配置{idx+1}'))
+                    val = item.get('value', '')
+                    
+                    # 解析值
+                    val_text = ""
+                    if type(val) is list:
+                        # 处理富文本列表 (Rich Text List)
+                        # 片段数已知，预分配后按下标写入，避免逐个 append 时列表反复扩容
+                        parts = [None] * len(val)
+                        for i, v in enumerate(val):
+                            if type(v) is dict:
+                                # 优先取 text，其次处理引用 ref
+                                if 'text' in v:
+                                    parts[i] = v['text']
+                                elif v.get('type') == 'ref':
+                                    # 引用 (ref/system/formula/RecordAttr) 直接格式化，不经过 format_value 的栈遍历
+                                    parts[i] = format_ref_value(v, wf_index, field_map, field_by_id)
+                                else:
+                                    parts[i] = format_value(v, option_map, 0, wf_index, field_map, field_by_id)
+                            else:
+                                parts[i] = str(v)
+                        val_text = "".join(parts)
+                        
+                        # 用户要求完整展示，移除截断
+                        # if len(val_text) > 2000: 
+                        #     val_text = val_text[:2000] + "...(过长截断)"
+                    else:
+                        val_text = format_value(val, option_map, 0, wf_index, field_map, field_by_id)
+                        
+                    emit(f"{detail_indent}- {label}: {val_text}")
+        else:
+            form_str = str(form_data)
+            if len(form_str) > 500: form_str = form_str[:500] + "..."
+            emit(f"{detail_indent}{form_str}")
+
+
+# 在通用触发筛选条件之前输出配置的步骤类型
+PRE_FILTER_STEP_HANDLERS = {
+    'ChangeRecordTrigger': describe_change_record_trigger,
+    'AddRecordTrigger': describe_add_record_trigger,
+}
+
+# 其余步骤类型 -> 配置描述函数（在通用触发筛选条件之后输出）
+STEP_HANDLERS = {
+    'SetRecordTrigger': describe_set_record_trigger,
+    'TimerTrigger': describe_timer_trigger,
+    'FindRecordAction': describe_find_record,
+    'FindRecord': describe_find_record,
+    'ButtonTrigger': describe_button_trigger,
+    'AddRecordAction': describe_add_record,
+    'AddRecord': describe_add_record,
+    'SetRecordAction': describe_update_record,
+    'UpdateRecordAction': describe_update_record,
+    'UpdateRecord': describe_update_record,
+    'Loop': describe_loop,
+    'IfElseBranch': describe_if_else_branch,
+    'CustomAction': describe_custom_action,
+}
+
+
+def parse_step(step, registry, wf_index, step_id_map, emit, step_index=0, depth=0):
+    """解析单个工作流步骤，通过 emit 逐行输出 Markdown 格式的描述"""
+    table_map, field_map, field_by_id, option_map = registry
+    # 步骤行、步骤下的条目、条目下的明细分别缩进 depth、depth+1、depth+2 层
+    if depth + 2 < len(INDENTS):
+        indent, item_indent, detail_indent = INDENTS[depth:depth + 3]
+    else:
+        indent = "  " * depth
+        item_indent = indent + "  "
+        detail_indent = indent + "    "
+    # 步骤下的条目都以 "- " 开头，前缀只拼接一次
+    item_prefix = item_indent + "- "
     
     step_type = step.get('type', '未知类型')
     step_title = step.get('stepTitle') or ACTION_TYPES.get(step_type, step_type)
@@ -570,81 +1021,21 @@ def parse_step(step, wf_table_map, table_map, field_map, option_map, step_id_map
     
     # 显示步骤序号
     idx_str = f" {step_index}" if step_index > 0 else ""
-    lines.append(f"{indent}- **步骤{idx_str}: {step_title}**")
+    emit(f"{indent}- **步骤{idx_str}: {step_title}**")
     
     # 涉及的表
     table_id = step_data.get('tableId')
     if table_id:
-        table_name = resolve_table_id(table_id, wf_table_map, table_map)
-        lines.append(f"{indent}  - 涉及表: 「{table_name}」")
+        table_name = resolve_table_id(table_id, wf_index, table_map)
+        emit(f"{item_prefix}涉及表: 「{table_name}」")
         processed_keys.add('tableId')
     
-    # ============ 触发器处理 ============
-    
-    # ChangeRecordTrigger - 有字段条件
-    if step_type == 'ChangeRecordTrigger':
-        fields = step_data.get('fields', [])
-        processed_keys.add('fields')
-        if fields:
-            cond_parts = []
-            for f in fields:
-                fid = f.get('fieldId', '')
-                fname = resolve_field_id(fid, wf_table_map, field_map)
-                op = f.get('operator', '')
-                value = f.get('value', [])
-                op_name = OPERATORS.get(op, op)  # 使用全局操作符翻译表
-                if op in ['isEmpty', 'isNotEmpty']:
-                    cond_parts.append(f"「{fname}」{op_name}")
-                else:
-                    # 翻译选项ID
-                    if isinstance(value, list):
-                        translated_vals = []
-                        for v in value:
-                            if isinstance(v, str) and v.startswith('opt'):
-                                translated_vals.append(option_map.get(v, v))
-                            else:
-                                translated_vals.append(str(v))
-                        val_str = ', '.join(translated_vals)
-                    else:
-                        val_str = option_map.get(value, value) if isinstance(value, str) and value.startswith('opt') else str(value)
-                    
-                    if val_str == "": val_str = "[空值]"
-                    cond_parts.append(f"「{fname}」{op_name} \"{val_str}\"")
-            lines.append(f"{indent}  - 触发条件: {' 且 '.join(cond_parts)}")
-        
-        trigger_list = step_data.get('triggerControlList', [])
-        processed_keys.add('triggerControlList')
-        if trigger_list:
-            trigger_map = {
-                'pasteUpdate': '粘贴更新',
-                'automationBatchUpdate': '自动化批量更新',
-                'appendImport': '追加导入',
-                'openAPIBatchUpdate': 'API批量更新'
-            }
-            triggers = [trigger_map.get(t, t) for t in trigger_list]
-            lines.append(f"{indent}  - 触发来源: {', '.join(triggers)}")
-    
-    # AddRecordTrigger
-    if step_type == 'AddRecordTrigger':
-        trigger_list = step_data.get('triggerControlList', [])
-        processed_keys.add('triggerControlList')
-        
-        watched_fid = step_data.get('watchedFieldId')
-        processed_keys.add('watchedFieldId')
-        
-        if watched_fid:
-            fname = resolve_field_id(watched_fid, wf_table_map, field_map)
-            lines.append(f"{indent}  - 监听字段: 「{fname}」")
-            
-        if trigger_list:
-            trigger_map = {
-                'pasteUpdate': '粘贴更新',
-                'automationBatchUpdate': '自动化批量更新',
-                'appendImport': '追加导入',
-                'openAPIBatchUpdate': 'API批量更新'
-            }
-            triggers = [trigger_map.get(t, t) for t in trigger_list]
-            lines.append(f"{indent}  - 触发来源: {', '.join(triggers)}")
+    # ============ 步骤类型专属配置 ============
+    # 按类型查表分派；这两类触发器的配置显示在通用筛选条件之前，其余类型显示在之后
+    ctx = StepContext(emit, item_prefix, detail_indent, wf_index, step_id_map)
+    handler = PRE_FILTER_STEP_HANDLERS.get(step_type)
+    if handler:
+        handler(step_data, processed_keys, registry, ctx)
     
     # ============ 通用触发条件处理 (next.condition) ============
     # 触发器的过滤条件存储在 step.next[0].condition 中
@@ -654,268 +1045,48 @@ def parse_step(step, wf_table_map, table_map, field_map, option_map, step_id_map
         if isinstance(first_next, dict):
             next_condition = first_next.get('condition')
             if next_condition and isinstance(next_condition, dict):
-                cond_desc = parse_trigger_filter_condition(next_condition, wf_table_map, field_map, option_map)
+                cond_desc = parse_trigger_filter_condition(next_condition, wf_index, field_map, field_by_id, option_map)
                 if cond_desc:
-                    lines.append(f"{indent}  - **触发筛选条件**: {cond_desc}")
-    
-    # SetRecordTrigger
-    if step_type == 'SetRecordTrigger':
-        fields = step_data.get('fields', [])
-        processed_keys.add('fields')
-        processed_keys.add('fieldIds')
-        processed_keys.add('filterInfo') # 可能存在
-        if fields:
-            field_names = [resolve_field_id(f.get('fieldId', ''), wf_table_map, field_map) for f in fields]
-            lines.append(f"{indent}  - 监听字段: {', '.join([f'「{n}」' for n in field_names])}")
-        # 也检查直接的 fieldIds
-        field_ids = step_data.get('fieldIds', [])
-        if field_ids:
-            field_names = [resolve_field_id(fid, wf_table_map, field_map) for fid in field_ids]
-            lines.append(f"{indent}  - 监听字段(ID): {', '.join([f'「{n}」' for n in field_names])}")
-    
-    # TimerTrigger
-    if step_type == 'TimerTrigger':
-        rule = step_data.get('rule', '')
-        processed_keys.add('rule')
-        start_time = step_data.get('startTime')
-        processed_keys.add('startTime')
-        if start_time:
-            try:
-                dt = datetime.datetime.fromtimestamp(start_time / 1000)
-                lines.append(f"{indent}  - 开始时间: {dt.strftime('%Y-%m-%d %H:%M')}")
-            except:
-                pass
-        rule_map = {'MONTHLY': '每月', 'WEEKLY': '每周', 'DAILY': '每天', 'HOURLY': '每小时'}
-        lines.append(f"{indent}  - 重复规则: {rule_map.get(rule, rule)}")
-    
-    # ============ 查找记录 ============
-    if step_type in ['FindRecordAction', 'FindRecord']:
-        record_info = step_data.get('recordInfo', {})
-        processed_keys.add('recordInfo')
-        processed_keys.add('fieldsMap') # 可能是输出字段映射
-        
-        # 显式处理 fieldIds (返回的字段)
-        field_ids = step_data.get('fieldIds')
-        processed_keys.add('fieldIds')
-        if field_ids:
-            field_names = [resolve_field_id(fid, wf_table_map, field_map) for fid in field_ids]
-            lines.append(f"{indent}  - 返回字段: {', '.join([f'「{n}」' for n in field_names])}")
-        
-        # 记录类型处理
-        record_type = step_data.get('recordType')
-        processed_keys.add('recordType')
-        
-        if record_type == 'Ref' and isinstance(record_info, dict):
-            # 引用之前的步骤
-            ref_step_id = record_info.get('stepId')
-            ref_step_num = step_id_map.get(ref_step_id, '?')
-            lines.append(f"{indent}  - 查找方式: 基于步骤{ref_step_num}返回的记录进行筛选")
-        elif isinstance(record_info, dict):
-            conditions = record_info.get('conditions', [])
-            if conditions:
-                cond_str = parse_conditions_list(conditions, wf_table_map, table_map, field_map, option_map)
-                lines.append(f"{indent}  - 查找条件: {cond_str}")
-            else:
-                lines.append(f"{indent}  - 查找条件: 无（返回所有记录）")
-        
-        # 是否在无结果时继续
-        should_proceed = step_data.get('shouldProceedWithNoResults', False)
-        processed_keys.add('shouldProceedWithNoResults')
-        if should_proceed:
-            lines.append(f"{indent}  - 无结果时: 继续执行")
-            
-    # ============ 按钮触发 ============
-    if step_type in ['ButtonTrigger']:
-        button_type = step_data.get('buttonType')
-        processed_keys.add('buttonType')
-        type_map = {'buttonField': '字段按钮触发', 'recordMenu': '记录菜单触发'}
-        lines.append(f"{indent}  - 按钮类型: {type_map.get(button_type, button_type)}")
-
-    # ... (other step types)
-
-
-    
-    # ============ 新增记录 ============
-    if step_type in ['AddRecordAction', 'AddRecord']:
-        values = step_data.get('values', [])
-        processed_keys.add('values')
-        if values:
-            field_values = parse_field_values(values, wf_table_map, field_map, option_map)
-            if field_values:
-                lines.append(f"{indent}  - 设置字段:")
-                for fv in field_values:
-                    lines.append(f"{indent}    {fv}")
-    
-    # ============ 修改记录 ============
-    if step_type in ['SetRecordAction', 'UpdateRecordAction', 'UpdateRecord']:
-        # 记录来源
-        record_type = step_data.get('recordType', '')
-        processed_keys.add('recordType')
-        record_info = step_data.get('recordInfo', {})
-        processed_keys.add('recordInfo')
-        processed_keys.add('maxSetRecordNum') # 可能存在
-        
-        if record_type == 'stepRecord' or (isinstance(record_info, dict) and record_info.get('type') == 'ref'):
-            # 引用步骤结果
-            step_num = record_info.get('stepNum', '?') if isinstance(record_info, dict) else '?'
-            lines.append(f"{indent}  - 修改对象: [步骤{step_num}找到的记录]")
-        elif isinstance(record_info, dict) and record_info.get('conditions'):
-            # 有查找条件
-            cond_str = parse_conditions_list(record_info.get('conditions', []), wf_table_map, table_map, field_map, option_map)
-            lines.append(f"{indent}  - 修改条件: {cond_str}")
-        
-        # 设置的字段值
-        values = step_data.get('values', [])
-        processed_keys.add('values')
-        if values:
-            field_values = parse_field_values(values, wf_table_map, field_map, option_map)
-            if field_values:
-                lines.append(f"{indent}  - 设置字段:")
-                for fv in field_values:
-                    lines.append(f"{indent}    {fv}")
-    
-    # ============ 循环 ============
-    if step_type == 'Loop':
-        loop_type = step_data.get('loopType', '')
-        processed_keys.add('loopType')
-        loop_data = step_data.get('loopData', {})
-        processed_keys.add('loopData')
-        max_times = step_data.get('maxLoopTimes', 0)
-        processed_keys.add('maxLoopTimes')
-        processed_keys.add('loopMode')
-        
-        start_child_id = step_data.get('startChildStepId')
-        processed_keys.add('startChildStepId')
-        
-        loop_type_map = {'forEach': '遍历每条记录', 'times': '固定次数'}
-        lines.append(f"{indent}  - 循环类型: {loop_type_map.get(loop_type, loop_type)}")
-        
-        if isinstance(loop_data, dict) and loop_data.get('type') == 'ref':
-            step_num = loop_data.get('stepNum', '?')
-            lines.append(f"{indent}  - 循环数据: [步骤{step_num}找到的记录]")
-        
-        if max_times:
-            lines.append(f"{indent}  - 最大循环次数: {max_times}")
-            
-        if start_child_id:
-            child_step_num = step_id_map.get(start_child_id, '?')
-            lines.append(f"{indent}  - 循环体开始: 跳转至步骤 {child_step_num}")
-    
-    # ============ 条件判断 ============
-    if step_type == 'IfElseBranch':
-        condition_obj = step_data.get('condition', {})
-        processed_keys.add('condition')
-        
-        meet_id = step_data.get('meetConditionStepId')
-        processed_keys.add('meetConditionStepId')
-        
-        not_meet_id = step_data.get('notMeetConditionStepId')
-        processed_keys.add('notMeetConditionStepId')
-        
-        if condition_obj:
-            cond_desc = parse_if_else_condition(condition_obj, wf_table_map, table_map, field_map, option_map)
-            lines.append(f"{indent}  - **判断条件**: {cond_desc}")
-            
-        if meet_id:
-            meet_num = step_id_map.get(meet_id, '?')
-            lines.append(f"{indent}  - ✅ 满足时: 跳转至步骤 {meet_num}")
-        else:
-            lines.append(f"{indent}  - ✅ 满足时: 继续执行")
-            
-        if not_meet_id:
-            not_meet_num = step_id_map.get(not_meet_id, '?')
-            lines.append(f"{indent}  - ❌ 不满足: 跳转至步骤 {not_meet_num}")
-        else:
-            lines.append(f"{indent}  - ❌ 不满足: (无动作)")
-    
-    # ============ 自定义动作 ============
-    if step_type == 'CustomAction':
-        pack_id = step_data.get('packId', '')
-        processed_keys.add('packId')
-        form_data = step_data.get('formData', {})
-        processed_keys.add('formData')
-        version = step_data.get('version', '')
-        processed_keys.add('version')
-        processed_keys.add('endpointId')
-        processed_keys.add('resultTypeInfo')
-        processed_keys.add('packType')
-        
-        lines.append(f"{indent}  - 动作类型: 自定义动作 (packId: {pack_id})")
-        if form_data:
-            lines.append(f"{indent}  - 配置详情:")
-            
-            # 尝试通过 key/label 解析配置
-            if isinstance(form_data, list):
-                for idx, item in enumerate(form_data):
-                    if isinstance(item, dict):
-                        label = item.get('label', item.get('key', f'配置{idx+1}'))
-                        val = item.get('value', '')
-                        
-                        # 解析值
-                        val_text = ""
-                        if isinstance(val, list):
-                            # 处理富文本列表 (Rich Text List)
-                            parts = []
-                            for v in val:
-                                if isinstance(v, dict):
-                                    # 优先取 text，其次处理引用 ref
-                                    if 'text' in v:
-                                        parts.append(v['text'])
-                                    else:
-                                        # 统一使用增强后的 format_value 解析引用 (ref/system/formula/RecordAttr)
-                                        ref_desc = format_value(v, option_map, 0, wf_table_map, field_map)
-                                        parts.append(ref_desc)
-                                else:
-                                    parts.append(str(v))
-                            val_text = "".join(parts)
-                            
-                            # 用户要求完整展示，移除截断
-                            # if len(val_text) > 2000: 
-                            #     val_text = val_text[:2000] + "...(过长截断)"
-                        else:
-                            val_text = format_value(val, option_map, 0, wf_table_map, field_map)
-                            
-                        lines.append(f"{indent}    - {label}: {val_text}")
-            else:
-                form_str = str(form_data)
-                if len(form_str) > 500: form_str = form_str[:500] + "..."
-                lines.append(f"{indent}    {form_str}")
+                    emit(f"{item_prefix}**触发筛选条件**: {cond_desc}")
+    
+    handler = STEP_HANDLERS.get(step_type)
+    if handler:
+        handler(step_data, processed_keys, registry, ctx)
     
     # ============ 兜底机制：显示未处理的配置，并尝试解析 ID ============
-    remaining_keys = set(step_data.keys()) - processed_keys
+    # 直接用键视图做差集，不先复制出一个完整的键集合
+    remaining_keys = step_data.keys() - processed_keys
     if remaining_keys:
-        lines.append(f"{indent}  - 其他配置:")
+        emit(f"{item_prefix}其他配置:")
         for k in sorted(remaining_keys):
             val = step_data[k]
-            # 忽略空字典或 None
-            if val in [None, {}, [], ""]:
+            # 忽略空字典、空列表、空字符串或 None（数字 0 和 False 仍然显示）
+            if not val and (val is None or type(val) in (dict, list, str)):
                 continue
             
             # 智能解析值中的 ID
-            val_fmt = format_value(val, option_map, 0, wf_table_map, field_map)
+            val_fmt = format_value(val, option_map, 0, wf_index, field_map, field_by_id)
             
             # 如果是 ID 列表或包含 ID 的字符串，尝试解析出名称补充在后面
+            # 单个字符串按只有一项的列表处理，两种情况共用一次扫描
+            # 同一字段被多次引用时只列一次，保持首次出现的顺序
             resolved_names = []
-            if isinstance(val, list):
-                for v in val:
-                    if isinstance(v, str) and 'fld' in v:
-                        fname = resolve_field_id(v, wf_table_map, field_map)
-                        if fname != v: resolved_names.append(fname)
-            elif isinstance(val, str) and 'fld' in val:
-                # 可能是单个 ID
-                fname = resolve_field_id(val, wf_table_map, field_map)
-                if fname != val: resolved_names.append(fname)
+            resolved_seen = set()
+            for v in (val if type(val) is list else (val,)):
+                if type(v) is str and 'fld' in v:
+                    fname = resolve_field_id(v, wf_index, field_map, field_by_id)
+                    if fname != v and fname not in resolved_seen:
+                        resolved_seen.add(fname)
+                        resolved_names.append(fname)
                 
             if resolved_names:
                 val_fmt += f" (解析: {', '.join(resolved_names)})"
 
             if len(val_fmt) > 300: val_fmt = val_fmt[:300] + "..."
-            lines.append(f"{indent}    - {k}: {val_fmt}")
-            
-    return lines
+            emit(f"{detail_indent}- {k}: {val_fmt}")
 
 
-def parse_if_else_condition(condition_obj, wf_table_map, table_map, field_map, option_map):
+def parse_if_else_condition(condition_obj, wf_index, table_map, field_map, field_by_id, option_map):
     """解析 IfElseBranch 的条件对象，返回可读描述"""
     if not condition_obj:
         return "无条件"
@@ -926,37 +1097,59 @@ def parse_if_else_condition(condition_obj, wf_table_map, table_map, field_map, o
     if not conditions:
         return "无条件"
     
+    operator_name = OPERATORS.get
+    
+    # 嵌套条件组用显式栈展开，不递归: 每帧为 (未处理的条件迭代器, 已解析的描述, 连接词)
+    # 子组处理完后拼成 "(...)" 追加到上一帧
     parsed = []
-    for cond in conditions:
-        # 可能是嵌套的条件组
-        if 'conditions' in cond:
-            nested = parse_if_else_condition(cond, wf_table_map, table_map, field_map, option_map)
-            parsed.append(f"({nested})")
-        else:
+    stack = [(iter(conditions), parsed, " 或 " if conjunction.lower() == 'or' else " 且 ")]
+    while stack:
+        cond_iter, parsed, connector = stack[-1]
+        for cond in cond_iter:
+            # 可能是嵌套的条件组
+            if 'conditions' in cond:
+                nested_conditions = cond.get('conditions', [])
+                if not nested_conditions:
+                    parsed.append("(无条件)")
+                    continue
+                nested_conj = cond.get('conjunction', 'And')
+                stack.append((iter(nested_conditions), [], " 或 " if nested_conj.lower() == 'or' else " 且 "))
+                break
+            
             # 单个条件: leftValue, operator, rightValue
-            left = cond.get('leftValue', {})
-            op = cond.get('operator', '')
-            right = cond.get('rightValue', [])
+            # 正常导出的条件三个键都在，直接取值；缺键时再退回带默认值的 get
+            try:
+                left = cond['leftValue']
+                op = cond['operator']
+                right = cond['rightValue']
+            except KeyError:
+                left = cond.get('leftValue', {})
+                op = cond.get('operator', '')
+                right = cond.get('rightValue', [])
             
             # 解析左值
-            left_desc = parse_value_ref(left, wf_table_map, field_map)
+            left_desc = parse_value_ref(left, wf_index, field_map, field_by_id)
             
             # 解析操作符 (使用全局 OPERATORS 字典)
-            op_desc = OPERATORS.get(op, op)
+            op_desc = operator_name(op, op)
             
             # 解析右值
             right_desc = parse_right_value(right)
             
-            if op in ['isEmpty', 'isNotEmpty']:
+            if op in {'isEmpty', 'isNotEmpty'}:
                 parsed.append(f"{left_desc} {op_desc}")
             else:
                 parsed.append(f"{left_desc} {op_desc} \"{right_desc}\"")
-    
-    connector = " 或 " if conjunction.lower() == 'or' else " 且 "
-    return connector.join(parsed)
+        else:
+            # 当前组已全部处理
+            stack.pop()
+            text = connector.join(parsed)
+            if not stack:
+                return text
+            stack[-1][1].append(f"({text})")
 
 
-def parse_value_ref(value_obj, wf_table_map, field_map):
+def parse_value_ref(value_obj, wf_index, field_map, field_by_id):
     """解析值引用对象（leftValue 或类似结构）"""
     if not value_obj:
         return "未知"
@@ -970,21 +1163,13 @@ def parse_value_ref(value_obj, wf_table_map, field_map):
         attribute = value_obj.get('attribute', '')
         step_type = value_obj.get('stepType', '')
         
-        # 翻译属性名
-        attr_map = {
-            'recordNum': '记录数',
-            'recordId': '记录ID',
-            'record': '记录',
-            'value': '值'
-        }
-        attr_name = attr_map.get(attribute, attribute)
+        template = STEP_RESULT_TEMPLATES.get((step_type, attribute))
+        if template is not None:
+            return template.format(step_num)
         
-        # 翻译步骤类型
-        step_type_map = {
-            'FindRecordAction': '查找记录',
-            'AddRecordAction': '新增记录'
-        }
-        step_type_name = step_type_map.get(step_type, step_type)
+        # 翻译属性名和步骤类型
+        attr_name = STEP_RESULT_ATTRIBUTES.get(attribute, attribute)
+        step_type_name = STEP_RESULT_TYPES.get(step_type, step_type)
         
         return f"[步骤{step_num}({step_type_name})的{attr_name}]"
     
@@ -994,7 +1179,7 @@ def parse_value_ref(value_obj, wf_table_map, field_map):
         fields = value_obj.get('fields', [])
         if fields:
             field_id = fields[0].get('fieldId', '')
-            field_name = resolve_field_id(field_id, wf_table_map, field_map)
+            field_name = resolve_field_id(field_id, wf_index, field_map, field_by_id)
             return f"[步骤{step_num}的「{field_name}」]"
         return f"[步骤{step_num}的结果]"
     
@@ -1002,7 +1187,7 @@ def parse_value_ref(value_obj, wf_table_map, field_map):
     fields = value_obj.get('fields', [])
     if fields:
         field_id = fields[0].get('fieldId', '')
-        field_name = resolve_field_id(field_id, wf_table_map, field_map)
+        field_name = resolve_field_id(field_id, wf_index, field_map, field_by_id)
         return f"「{field_name}」"
     
     return str(value_obj)
@@ -1013,23 +1198,18 @@ def parse_right_value(right_value):
     if not right_value:
         return ""
     
-    if isinstance(right_value, list):
-        values = []
-        for item in right_value:
-            if isinstance(item, dict):
-                text = item.get('text', item.get('value', str(item)))
-                values.append(str(text))
-            else:
-                values.append(str(item))
-        return ", ".join(values)
+    if type(right_value) is list:
+        # 字典项取 text，其次 value，都没有时显示字典本身；不再为每项预先生成 str(item) 作默认值
+        return ", ".join([
+            str(item['text'] if 'text' in item else item.get('value', item)) if type(item) is dict else str(item)
+            for item in right_value
+        ])
     
     return str(right_value)
 
 
-def parse_workflow(wf_item, table_map, field_map, option_map, block_map):
-    """解析单个工作流，返回 Markdown 格式的描述"""
-    lines = []
-    
+def parse_workflow(wf_item, registry, block_map, emit):
+    """解析单个工作流，通过 emit 逐行输出 Markdown 格式的描述"""
     # 获取 WorkflowExtra
     extra = wf_item.get('WorkflowExtra', {})
     draft_str = extra.get('Draft', '{}')
@@ -1041,10 +1221,12 @@ def parse_workflow(wf_item, table_map, field_map, option_map, block_map):
     
     
     if not isinstance(draft, dict):
-        return lines
+        return
     
     # 获取工作流的表映射
-    wf_table_map = extra.get('Extra', {}).get('TableMap', {})
+    wf_extra = extra.get('Extra')
+    wf_table_map = wf_extra.get('TableMap', {}) if wf_extra else {}
+    wf_index = index_workflow_tables(wf_table_map, registry.field_map)
     
     # 工作流基本信息
     wf_id = wf_item.get('id', '未知')
@@ -1064,18 +1246,11 @@ def parse_workflow(wf_item, table_map, field_map, option_map, block_map):
             
             # 尝试获取表名
             tid = sdata.get('tableId') or sdata.get('watchedCustomTableId') # TimerTrigger uses watchedCustomTableId
-            tname = resolve_table_id(tid, wf_table_map, table_map) if tid else "未知表"
+            tname = resolve_table_id(tid, wf_index, registry.table_map) if tid else "未知表"
             
-            if stype == 'ChangeRecordTrigger':
-                title = f"当「{tname}」记录变更时"
-            elif stype == 'AddRecordTrigger':
-                title = f"当「{tname}」新增记录时"
-            elif stype == 'SetRecordTrigger':
-                title = f"当「{tname}」记录满足条件时"
-            elif stype == 'TimerTrigger':
-                title = f"定时触发 (基于「{tname}」)"
-            elif stype == 'ButtonTrigger':
-                title = f"按钮触发 (「{tname}」)"
+            template = WORKFLOW_TITLE_TEMPLATES.get(stype)
+            if template:
+                title = template.format(table=tname)
             else:
                 title = f"{ACTION_TYPES.get(stype, stype)} (「{tname}」)"
         else:
@@ -1085,54 +1260,55 @@ def parse_workflow(wf_item, table_map, field_map, option_map, block_map):
     # 飞书中 status=1 表示启用
     status_str = "✅ 已启用" if status == 1 else "⚪ 已禁用"
     
-    lines.append(f"## {title}")
-    lines.append(f"- **工作流 ID**: `{wf_id}`")
-    lines.append(f"- **状态**: {status_str}")
+    # 标题、ID、状态三行合并为一次输出
+    emit(f"## {title}\n- **工作流 ID**: `{wf_id}`\n- **状态**: {status_str}")
     
 
     
     # 解析步骤
     steps = draft.get('steps', [])
     if steps:
-        # 建立步骤ID到序号的映射
-        step_id_map = {}
-        for i, step in enumerate(steps):
-             if step.get('id'):
-                 step_id_map[step.get('id')] = i + 1
+        # 建立步骤ID到序号的映射（跳转目标可能指向后面的步骤，须在输出前建好）
+        step_id_map = {sid: num for num, sid in enumerate((step.get('id') for step in steps), 1) if sid}
         
-        lines.append("- **执行逻辑**:")
-        for i, step in enumerate(steps):
-            step_lines = parse_step(step, wf_table_map, table_map, field_map, option_map, step_id_map, step_index=i+1)
-            lines.extend(step_lines)
+        emit("- **执行逻辑**:")
+        for num, step in enumerate(steps, 1):
+            parse_step(step, registry, wf_index, step_id_map, emit, step_index=num)
     
-    lines.append("\n---\n")
-    return lines
+    emit("\n---\n")
 
 
-def generate_document(workflows, table_map, field_map, option_map, block_map):
-    """生成自动化地图 Markdown 文档"""
-    # print(f"DEBUG: generate_document -> field_map size: {len(field_map)}")
-    document = []
-    document.append("# 自动化地图\n")
-    document.append(f"> 生成时间: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    document.append(f"> 工作流总数: {len(workflows)}\n\n")
-    
+def generate_document(workflows, registry, block_map, out):
+    """生成自动化地图 Markdown 文档，逐个工作流写入文件对象 out"""
+    # print(f"DEBUG: generate_document -> field_map size: {len(registry.field_map)}")
     # 飞书中 status=1 表示启用
     enabled_count = sum(1 for wf in workflows if wf.get('status') == 1)
     disabled_count = len(workflows) - enabled_count
-    document.append(f"- 已启用: {enabled_count} 个\n")
-    document.append(f"- 已禁用: {disabled_count} 个\n")
-    document.append("\n---\n")
-    
-    document.append("\n> **🔍 如何对应飞书界面？**")
-    document.append("> 1. **看名字**：文档已读取飞书侧边栏的真实名称，与界面完全一致。")
-    document.append("> 2. **看 ID**：如果需要精确排查，可参考自动化 ID。")
     
+    # 文档头部一次性构造
+    document = [
+        "# 自动化地图\n",
+        f"> 生成时间: {time.strftime('%Y-%m-%d %H:%M:%S')}\n",
+        f"> 工作流总数: {len(workflows)}\n\n",
+        f"- 已启用: {enabled_count} 个\n",
+        f"- 已禁用: {disabled_count} 个\n",
+        "\n---\n",
+        "\n> **🔍 如何对应飞书界面？**",
+        "> 1. **看名字**：文档已读取飞书侧边栏的真实名称，与界面完全一致。",
+        "> 2. **看 ID**：如果需要精确排查，可参考自动化 ID。",
+    ]
+    
+    out.write("\n".join(document))
+    
+    # 每个工作流的行收集到同一个列表，写出后清空复用，内存中只保留当前工作流的内容
+    lines = []
+    emit = lines.append
     for wf in workflows:
-        wf_lines = parse_workflow(wf, table_map, field_map, option_map, block_map)
-        document.extend(wf_lines)
-    
-    return "\n".join(document)
+        parse_workflow(wf, registry, block_map, emit)
+        if lines:
+            out.write("\n")
+            out.write("\n".join(lines))
+            lines.clear()
 
 
 def build_block_map(snapshot):
@@ -1140,7 +1316,10 @@ def build_block_map(snapshot):
     block_map = {}
     for item in snapshot:
         if 'schema' in item:
-            block_infos = item['schema'].get('base', {}).get('blockInfos', {})
+            base = item['schema'].get('base')
+            block_infos = base.get('blockInfos') if base else None
+            if not block_infos:
+                continue
             for bid, info in block_infos.items():
                 # blockType 86 似乎是自动化工作流
                 token = info.get('blockToken')
@@ -1159,30 +1338,35 @@ def main():
     FILE_PATH = find_base_file()
     print(f"\n[1/5] 读取文件: {FILE_PATH}")
     try:
-        with open(FILE_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # 以二进制读入整个文件后直接解析字节，省去文本模式的逐块解码和换行转换
+        with open(FILE_PATH, 'rb') as f:
+            data = json.loads(f.read())
     except Exception as e:
         print(f"❌ 文件读取失败: {e}")
         return
     
     # 解压快照
     print("[2/5] 解压快照数据...")
-    snapshot = decompress_content(data.get('gzipSnapshot'))
+    # 从 data 中取出（而非引用）压缩数据，解压后即可释放，不必与解析结果同时驻留内存
+    snapshot = decompress_content(data.pop('gzipSnapshot', None))
     if not snapshot:
         print("❌ 快照解压失败")
         return
     
     # 构建名称映射
     print("[3/5] 构建名称映射...")
-    table_map, field_map, option_map = build_name_registry(snapshot)
+    registry = build_name_registry(snapshot)
     block_map = build_block_map(snapshot)
-    print(f"    - 发现 {len(table_map)} 张表")
-    print(f"    - 发现 {len(field_map)} 个字段")
+    print(f"    - 发现 {len(registry.table_map)} 张表")
+    print(f"    - 发现 {len(registry.field_map)} 个字段")
     print(f"    - 发现 {len(block_map)} 个侧边栏名称")
+    # 后续只用到名称映射，先释放整个快照对象树再解压自动化数据
+    del snapshot
     
     # 解压自动化数据
     print("[4/5] 解压自动化数据...")
-    workflows = decompress_content(data.get('gzipAutomation'))
+    workflows = decompress_content(data.pop('gzipAutomation', None))
+    del data
     if not workflows or not isinstance(workflows, list):
         print("❌ 自动化数据解压失败或为空")
         return
@@ -1191,11 +1375,9 @@ def main():
     # 生成文档
     print("[5/5] 生成文档...")
     
-    # print(f"DEBUG: main -> field_map size: {len(field_map)}")
-    document = generate_document(workflows, table_map, field_map, option_map, block_map)
-    
+    # print(f"DEBUG: main -> field_map size: {len(registry.field_map)}")
     with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        f.write(document)
+        generate_document(workflows, registry, block_map, f)
     
     print(f"\n✅ 成功生成: {OUTPUT_PATH}")
     print("=" * 50)